@@ -39,5 +39,5 @@ setuptools.setup(
     packages=setuptools.find_namespace_packages(include=["tcgen*"]),
     license="MIT",
     url="https://github.com/JoshuaTianYangLiu/tcgen",
-    scripts=["scripts/tcgen", "scripts/genout"],
+    scripts=["scripts/tcgen", "scripts/genout", "scripts/stress"],
 )
@@ -2,7 +2,12 @@ from tcgen.utils.constants import LOWERCASE
 from tcgen.primitives import *
 from tcgen.primitives import SortableMixin
 from tcgen.utils.random import *
+from tcgen.utils.edges import CSR, EdgeList, decode_prufer
+from tcgen.utils.writer import WRITE_CHUNK, write_joined, write_lines
+from array import array
+import io
 import logging
+import typing
 
 
 # TODO: Add a parent class for DataType and Primitive to allow String to work as a primitive
@@ -23,7 +28,16 @@ __all__ = [
 ]
 
 
+# Graph weights are generated this many at a time
+WEIGHT_CHUNK = 1 << 16
+# Renders the bytes 0 to 9 of a bytearray grid row as digits
+_DIGITS = bytes.maketrans(bytes(range(10)), b"0123456789")
+
+
 class DataType:
+    # Like primitives, datatypes are slotted so small ones stay small
+    __slots__ = ("value",)
+
     def __init__(self):
         self.value = None
 
@@ -47,8 +61,18 @@ class DataType:
         random.shuffle(self.value)
         return self
 
+    def write(self, fp: typing.BinaryIO) -> None:
+        """
+        Writes the same text as str() to a binary file object
+
+        Datatypes that can get large override this to write in chunks
+        """
+        fp.write(str(self).encode())
+
 
 class Array(DataType):
+    __slots__ = ("N", "_type", "idx")
+
     def __init__(self, N: int, *args, type: Primitive = None, **kwargs):
         """
         Create an array of a specified primitive datatype
@@ -100,9 +124,7 @@ class Array(DataType):
         DataType.__init__(self)
 
     def _generate(self):
-        self.value = []
-        for _ in range(self.N):
-            self.value.append(self._type._generate())
+        self.value = self._type._generate_many(self.N)
 
     def assign(self, *args, **kwargs):
         # TODO: Allow primitive to be passed to overwrite self._type
@@ -111,7 +133,8 @@ class Array(DataType):
 
     def val(self):
         self.N = int(self.N)
-        super().__str__()
+        if not self.is_generated:
+            self._generate()
         return self.value
 
     def add(self, val):
@@ -153,28 +176,79 @@ class Array(DataType):
         self.val()
         return " ".join(map(str, self.value))
 
+    def write(self, fp: typing.BinaryIO) -> None:
+        self.val()
+        write_joined(fp, self.value)
+
     def __getitem__(self, item):
         self.val()
         return self.value[item]
 
+    def slice(self, lo: int, hi: int) -> list:
+        """
+        Returns elements [lo, hi) of the array
+
+        In a RandomContext only the values in range are drawn, they're the same
+        values generating the whole array gives, so a slice of a huge array can
+        be reproduced without generating the rest of it
+        """
+        N = int(self.N)
+        lo, hi, _ = slice(lo, hi).indices(N)
+        if self.is_generated or type(self)._generate is not Array._generate:
+            return self.val()[lo:hi]
+        return self._type._generate_many(N, lo, hi)
+
 
 class String(Array):
-    def __init__(self, N: int, char_set: str = LOWERCASE, *args, **kwargs):
+    __slots__ = ("as_bytes",)
+
+    def __init__(
+        self,
+        N: int,
+        char_set: str = LOWERCASE,
+        *args,
+        as_bytes: bool = False,
+        **kwargs,
+    ):
+        """
+        Create a string of a specified character set
+
+        Args:
+            N: Length of the string
+            char_set: Characters to pick from
+            as_bytes: Generate the value as bytes instead of str
+        """
         if "type" not in kwargs:
             kwargs["type"] = Char()
+        self.as_bytes = as_bytes
         Array.__init__(self, N, *args, char_set=char_set, **kwargs)
 
     def _generate(self):
-        self.value = ""
-        for _ in range(self.N):
-            self.value += self._type._generate()
+        if isinstance(self._type, Char):
+            self.value = self._type._generate_string(self.N, as_bytes=self.as_bytes)
+            return
+        self.value = "".join(self._type._generate_many(self.N))
+        if self.as_bytes:
+            self.value = self.value.encode()
 
     def __str__(self):
-        super().__str__()
+        self.val()
+        if self.as_bytes:
+            return self.value.decode()
         return self.value
 
+    def write(self, fp: typing.BinaryIO) -> None:
+        self.val()
+        if self.as_bytes:
+            fp.write(self.value)
+            return
+        for lo in range(0, len(self.value), WRITE_CHUNK):
+            fp.write(self.value[lo:lo + WRITE_CHUNK].encode())
+
 
 class NonDecreasing(Array):
+    __slots__ = ("increasing",)
+
     def __init__(self, N: int, *args, increasing: bool = True, **kwargs):
         self.increasing = increasing
 
@@ -184,9 +258,7 @@ class NonDecreasing(Array):
             raise TypeError
 
     def _generate(self):
-        self.value = []
-        for _ in range(self.N):
-            self.value.append(self._type._generate())
+        self.value = self._type._generate_many(self.N)
         self._sort()
 
     def _sort(self):
@@ -197,6 +269,8 @@ class NonDecreasing(Array):
 
 
 class StrictlyIncreasing(NonDecreasing):
+    __slots__ = ()
+
     def __init__(self, N: int, *args, **kwargs):
         NonDecreasing.__init__(self, N, *args, **kwargs)
 
@@ -204,44 +278,15 @@ class StrictlyIncreasing(NonDecreasing):
             raise ValueError("Asked for more values than can generate")
 
     def _generate(self):
-        # Bad memory comlpextity
-        # O(max(a_i))
-        # TODO: There's a better O(N) memory solution, using a nested binary search
-        # We need a DS which supports O(logn) insertion and sorting
-        tot_vals = self._type._total_values()
-        bit = [0] * (tot_vals + 1)
-
-        def update(idx, val):
-            while idx <= tot_vals:
-                bit[idx] += val
-                idx += idx & -idx
-
-        def query(idx):
-            ret = 0
-            while idx:
-                ret += bit[idx]
-                idx -= idx & -idx
-            return ret
-
-        for idx in range(1, tot_vals + 1):
-            update(idx, 1)
-
-        self.value = []
-        for cnt in range(self.N):
-            to_pick = random.randint(1, tot_vals - cnt)
-            l_ptr, r_ptr = 1, tot_vals
-            while l_ptr <= r_ptr:
-                m_ptr = (l_ptr + r_ptr) // 2
-                if query(m_ptr) < to_pick:
-                    l_ptr = m_ptr + 1
-                else:
-                    r_ptr = m_ptr - 1
-            update(l_ptr, -1)
-            self.value.append(self._type._kth_smallest(l_ptr))
+        # Pick N distinct ranks, then map them to values in one pass
+        ranks = random.sample(1, self._type._total_values(), self.N)
+        self.value = self._type._kth_smallest_many(ranks)
         self._sort()
 
 
 class Permutation(Array):
+    __slots__ = ()
+
     def __init__(self, N: int):
         # For now, it's 1 indexed.
         # Later on, I should consider if I should suppport other types
@@ -249,18 +294,30 @@ class Permutation(Array):
         Array.__init__(self, N, N)
 
     def _generate(self):
-        self.value = []
         tot_vals = self._type._total_values()
-        for idx in range(1, tot_vals + 1):
-            self.value.append(self._type._kth_smallest(idx))
+        self.value = self._type._kth_smallest_many(range(1, tot_vals + 1))
         self.shuffle()
 
 
 class Grid(DataType):
+    __slots__ = ("H", "W", "_type", "space_seperated", "compact")
+
     def __init__(
-        self, H: int, W: int, type: Primitive = None, *, space_seperated: bool = True
+        self,
+        H: int,
+        W: int,
+        type: Primitive = None,
+        *,
+        space_seperated: bool = True,
+        compact: bool = False,
     ):
-        """0-indexed grid"""
+        """
+        0-indexed grid
+
+        Args:
+            compact: Keep the rows of Bool grids, and of Integer grids in 0..255,
+                as bytearrays. They take a byte per cell, but only hold ints in 0..255
+        """
         # TODO: support 1-indexed
         # TODO: support default values
         type = type or Bool()
@@ -271,15 +328,32 @@ class Grid(DataType):
         self.W = W
         self._type = type
         self.space_seperated = space_seperated
+        self.compact = compact
         DataType.__init__(self)
 
+    def _byte_table(self):
+        """Every value the type can take as bytes, or None unless they all fit in a byte"""
+        t = self._type
+        if type(t) not in (Integer, Bool) or t.weighted:
+            return None
+        L, U = (t.L, t.U) if t._inclusive else (t.L + 1, t.U - 1)
+        if 0 <= L <= U <= 255:
+            return bytes(range(L, U + 1))
+        return None
+
     def _generate(self):
         # H rows, W elements in each row
         # Defined based off of https://dmoj.ca/problem/dph
-        self.value = [[self._type.default()] * self.W for _ in range(self.H)]
-        for r in range(self.H):
-            for c in range(self.W):
-                self.value[r][c] = self._type._generate()
+        table = self._byte_table()
+        if table == b"\x00\x01":
+            self.value = [random.randbits(self.W) for _ in range(self.H)]
+        elif table is not None:
+            self.value = [random.bytechoices(table, self.W) for _ in range(self.H)]
+        else:
+            self.value = [self._type._generate_many(self.W) for _ in range(self.H)]
+            return
+        if not self.compact:
+            self.value = [list(row) for row in self.value]
 
     def set(self, val):
         """Set all values in grid"""
@@ -289,14 +363,52 @@ class Grid(DataType):
     def val(self):
         self.H = int(self.H)
         self.W = int(self.W)
-        super().__str__()
+        if not self.is_generated:
+            self._generate()
         return self.value
 
+    def _row_bytes(self, arr, small: bool) -> typing.Optional[bytes]:
+        """
+        A row of single digits as text without the newline, None for any other row
+
+        Args:
+            small: Whether the type only takes values in 0..255
+        """
+        if not arr:
+            return None
+        if not isinstance(arr, bytearray):
+            # Cells set to anything but small ints after generating take the slow path
+            if not small or set(map(type, arr)) != {int} or not 0 <= min(arr) <= max(arr) < 10:
+                return None
+            arr = bytearray(arr)
+        elif max(arr) >= 10:
+            return None
+        # Translated in one go with the seperators slotted in between
+        digits = arr.translate(_DIGITS)
+        if not self.space_seperated:
+            return bytes(digits)
+        row = bytearray(b" ") * (2 * len(arr) - 1)
+        row[0::2] = digits
+        return bytes(row)
+
     def __str__(self):
+        self.val()
+        fp = io.BytesIO()
+        self.write(fp)
+        return fp.getvalue().decode()
+
+    def write(self, fp: typing.BinaryIO) -> None:
         self.val()
         seperator = " " if self.space_seperated else ""
-        ret = [seperator.join(map(str, arr)) for arr in self.value]
-        return "\n".join(ret)
+        small = self._byte_table() is not None
+        for r, arr in enumerate(self.value):
+            if r:
+                fp.write(b"\n")
+            row = self._row_bytes(arr, small)
+            if row is not None:
+                fp.write(row)
+            else:
+                write_joined(fp, arr, seperator)
 
     def __getitem__(self, idx):
         if self.value is None:
@@ -305,7 +417,10 @@ class Grid(DataType):
 
 
 class Graph(DataType):
-    # TODO: Add shuffle_nodes
+    __slots__ = ("N", "M", "W", "directed", "connected", "self_edge", "duplicate")
+    # Edges always go from the smaller to the larger node
+    _acyclic = False
+
     def __init__(
         self,
         N: int,
@@ -340,93 +455,188 @@ class Graph(DataType):
         return self.W is not None
 
     def _make_edge(self, u, v):
-        if self.W:
-            return (u, v, self.W._generate())
         return (u, v)
 
+    def _orient_edges(self, edges: EdgeList):
+        """Does what _make_edge does to every edge of a bulk generated EdgeList, in place"""
+        pass
+
+    def _add_weights(self):
+        # Weights are drawn in batches once every edge is known
+        M = len(self.value)
+        self.value.set_weights(
+            self.W._generate_many(min(WEIGHT_CHUNK, M - lo))
+            for lo in range(0, M, WEIGHT_CHUNK)
+        )
+
+    @property
+    def _unordered(self):
+        """Whether (u, v) and (v, u) are the same edge"""
+        return not self.directed or self._acyclic
+
+    @property
+    def _unique(self):
+        # Undirected graphs never get duplicate edges
+        return not self.duplicate or not self.directed
+
+    def _edge_key(self, u, v):
+        """Integer key of an edge, the same for (u, v) and (v, u) when unordered"""
+        if self._unordered and u > v:
+            u, v = v, u
+        return u * (self.N + 1) + v
+
+    def _max_edges(self):
+        """Number of distinct edges the graph can have"""
+        ret = self.N * (self.N - 1)
+        if self._unordered:
+            ret //= 2
+        if self.self_edge:
+            ret += self.N
+        return ret
+
+    def _add_random_edges(self, keys):
+        """Adds edges by rejection sampling, edges in keys are rejected when unique"""
+        unique = self._unique
+        while len(self.value) < self.M:
+            need = self.M - len(self.value)
+            for u, v in zip(random.randints(1, self.N, need), random.randints(1, self.N, need)):
+                if u == v and not self.self_edge:
+                    continue
+                if unique:
+                    key = self._edge_key(u, v)
+                    if key in keys:
+                        continue
+                    keys.add(key)
+                self.value.append(self._make_edge(u, v))
+
+    def _add_missing_edges(self, keys):
+        """Adds edges picked from every edge not in keys, for dense graphs"""
+        candidates = []
+        for u in range(1, self.N + 1):
+            lo = u if self._unordered else 1
+            base = u * (self.N + 1)
+            candidates.extend(
+                (u, v)
+                for v in range(lo, self.N + 1)
+                if base + v not in keys and (u != v or self.self_edge)
+            )
+        picked = random.pick(candidates, self.M - len(self.value))
+        if self._unordered and not self._acyclic:
+            # Candidates are listed with u <= v, orient them randomly
+            flips = random.randints(0, 1, len(picked))
+            picked = [(v, u) if flip else (u, v) for (u, v), flip in zip(picked, flips)]
+        self.value.extend(self._make_edge(u, v) for u, v in picked)
+
     def _generate_prufer(self):
-        return Array(self.N - 2, Integer(1, self.N)).val()
+        return random.randints(1, self.N, max(self.N - 2, 0))
 
     def _generate(self):
-        self.value = []
         logging.info("Generating tree")
         if self.connected:
-            # https://cp-algorithms.com/graph/pruefer_code.html
-            prufer = self._generate_prufer()
-            degree = [0] + [1] * (self.N)
-            for val in prufer:
-                degree[val] += 1
-            ptr = 0
-            while degree[ptr] != 1:
-                ptr += 1
-            leaf = ptr
-            for val in prufer:
-                self.value.append(self._make_edge(leaf, val))
-                degree[val] -= 1
-                if degree[val] == 1 and val < ptr:
-                    leaf = val
-                else:
-                    ptr += 1
-                    while degree[ptr] != 1:
-                        ptr += 1
-                    leaf = ptr
-            self.value.append(self._make_edge(leaf, self.N))
-
-        value_set = set()
-        for val in self.value:
-            value_set.add(val[:2])
-        integer = Integer(1, self.N)
+            self.value = decode_prufer(self._generate_prufer(), self.N)
+            self._orient_edges(self.value)
+        else:
+            self.value = EdgeList(self.N)
+
         logging.info("Generating the rest of the edges")
-        # TODO: improve generation by doing O(N^2) if N is small enough
-        for _ in range(len(self.value), self.M):
-            u, v = integer._generate(), integer._generate()
-            while not self.self_edge and u == v:
-                u, v = integer._generate(), integer._generate()
-            while not self.duplicate and (u, v) in value_set:
-                u, v = integer._generate(), integer._generate()
-            while not self.directed and any(
-                edge in value_set for edge in [(u, v), (v, u)]
-            ):
-                u, v = integer._generate(), integer._generate()
-
-            value_set.add((u, v))
-            self.value.append(self._make_edge(u, v))
+        if len(self.value) < self.M:
+            if not self._unique:
+                self._add_random_edges(set())
+            else:
+                keys = {self._edge_key(u, v) for u, v in self.value}
+                if self.M > self._max_edges():
+                    raise TypeError("Too many edges for graph")
+                # Rejection is O(1) per edge while at most half of the edges are taken
+                if 2 * self.M <= self._max_edges():
+                    self._add_random_edges(keys)
+                else:
+                    self._add_missing_edges(keys)
 
-    def adj_matrix(self):
+        if self.W:
+            self._add_weights()
+
+    def csr(self) -> CSR:
+        """
+        The adjacency in CSR form, undirected edges are listed from both ends
+
+        O(N + M), use it over adj_matrix for large graphs, e.g. degrees or BFS
+        """
         self.val()
+        return self.value.csr(self.N, self.directed)
+
+    def adj_list(self) -> typing.List[list]:
+        """Neighbours of every node, see CSR.adj_list"""
+        return self.csr().adj_list()
+
+    def write_adj_list(self, fp: typing.BinaryIO) -> None:
+        """Writes the graph as adjacency list text, see CSR.lines"""
+        write_lines(fp, self.csr().lines())
+
+    def adj_matrix(self):
+        """The N x N adjacency matrix as a Grid, built from the CSR form"""
+        csr = self.csr()
         ret = Grid(self.N, self.N).set(0)
-        for val in self.value:
-            if self.weighted:
-                u, v, w = val
-            else:
-                u, v = val
-                w = 1
-            # Make 0 indexed
-            u -= 1
-            v -= 1
-            ret[u][v] = w
-            if not self.directed:
-                ret[v][u] = w
+        for u in range(1, self.N + 1):
+            row = ret.value[u - 1]
+            weights = csr.edge_weights(u) if csr.weighted else [1] * csr.degree(u)
+            for v, w in zip(csr.neighbours(u), weights):
+                # Make 0 indexed
+                row[v - 1] = w
         return ret
 
     def val(self):
         self.N = int(self.N)
         self.M = int(self.M)
-        super().__str__()
+        if not self.is_generated:
+            self._generate()
         return self.value
 
     def __str__(self):
         self.val()
-        ret = [" ".join(map(str, v)) for v in self.value]
-        return "\n".join(ret)
+        return "\n".join(self.value.lines())
+
+    def write(self, fp: typing.BinaryIO) -> None:
+        self.val()
+        write_lines(fp, self.value.lines())
+
+    def shuffle(self):
+        """
+        Shuffles the order of the edges, undirected edges also get their
+        endpoints swapped at random
+        """
+        self.val()
+        M = len(self.value)
+        order = random.permutation(M)
+        flips = None if self.directed else random.randints(0, 1, M)
+        self.value.transform(order=order, flips=flips)
+        return self
+
+    def shuffle_nodes(self):
+        """
+        Relabels the nodes with a random permutation of 1 to N
+
+        Without it the labels follow how the graph was built, e.g. node N is
+        always the last node of the Prüfer decoding. A DAG keeps its edges
+        going from the smaller to the larger label, so it stays acyclic
+        """
+        self.val()
+        label = [0]
+        label.extend(map((1).__add__, random.permutation(self.N)))
+        self.value.transform(label=label)
+        self._orient_edges(self.value)
+        return self
 
 
 class Tree(Graph):
+    __slots__ = ()
+
     def __init__(self, N: int, W: Primitive = None):
         Graph.__init__(self, N, N - 1, W)
 
 
 class KRegularTree(Tree):
+    __slots__ = ("k",)
+
     def __init__(self, N: int, W: Primitive = None, k: int = 20):
         # 1000, 300, 50, 20
         if issubclass(k.__class__, Primitive):
@@ -440,16 +650,23 @@ class KRegularTree(Tree):
 
 
 class StarGraph(KRegularTree):
+    __slots__ = ()
+
     def __init__(self, N: int, W: Primitive = None):
         KRegularTree.__init__(self, N, W, N.val() - 2)
 
 
 class LineGraph(KRegularTree):
+    __slots__ = ()
+
     def __init__(self, N: int, W: Primitive = None):
         KRegularTree.__init__(self, N, W, 1)
 
 
 class DAG(Graph):
+    __slots__ = ()
+    _acyclic = True
+
     def __init__(self, *args, **kwargs):
         Graph.__init__(self, *args, directed=True, **kwargs)
 
@@ -460,3 +677,8 @@ class DAG(Graph):
         if u > v:
             u, v = v, u
         return super()._make_edge(u, v)
+
+    def _orient_edges(self, edges: EdgeList):
+        u, v = edges.u, edges.v
+        edges.u = array(u.typecode, map(min, u, v))
+        edges.v = array(v.typecode, map(max, u, v))
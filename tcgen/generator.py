@@ -1,26 +1,237 @@
 from abc import ABC, abstractmethod
+from tcgen.utils import random, RandomContext
+from tcgen.utils.writer import write_value
+import os
+import typing
+
+__all__ = [
+    "Generator",
+]
+
+# The generator a pool worker runs cases for, set once when the worker starts
+_worker_generator = None
+
+
+def _init_worker(generator):
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _run_worker_case(args):
+    return _worker_generator._run_case(*args)
+
+
+def _pool_context():
+    import multiprocessing
+
+    # Forked workers inherit the generator, even when its class lives in __main__
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
 
 
 class Generator(ABC):
+    # Binary file object that p() streams to, while writing a test case
+    _fp = None
+    # Text printed so far in the current test case
+    _chunks = None
+
     @abstractmethod
     def generate(self, case_num):
         pass
 
+    @property
+    def output(self) -> str:
+        """Everything printed so far in the current test case"""
+        return "".join(self._chunks or [])
+
+    @output.setter
+    def output(self, value: str):
+        self._chunks = [value] if value else []
+
     def p(self, *args):
-        self.output += " ".join(map(str, args))
-        self.output += "\n"
+        if self._fp is not None:
+            for idx, arg in enumerate(args):
+                if idx:
+                    self._fp.write(b" ")
+                write_value(self._fp, arg)
+            self._fp.write(b"\n")
+            return
+        if self._chunks is None:
+            self._chunks = []
+        self._chunks.extend((" ".join(map(str, args)), "\n"))
 
     print = p
 
-    def get_test_cases(self, N):
-        ret = []
-        for case_num in range(N):
-            self.output = ""
-            self.generate(case_num)
-            ret.append(self.output)
+    def _get_output(self, case_num):
+        self.output = ""
+        self.generate(case_num)
+        ret = self.output
+        self._chunks = None
         return ret
 
+    def _run_case(self, case_num, seed=None, path=None, fp=None):
+        """Runs one case, it is written to path or fp if given, otherwise returned"""
+        if seed is not None:
+            with RandomContext(seed, case_num):
+                return self._run_case(case_num, None, path, fp)
+        if path is not None:
+            with open(path.format(case_num), "wb") as fp:
+                self.write_test_case(fp, case_num)
+        elif fp is not None:
+            self.write_test_case(fp, case_num)
+        else:
+            return self._get_output(case_num)
+
+    def get_test_cases(
+        self,
+        N: int,
+        sink: typing.Union[None, str, typing.BinaryIO, typing.Callable] = None,
+        *,
+        seed: typing.Union[None, int, str] = None,
+        workers: typing.Optional[int] = 1,
+    ) -> typing.Optional[typing.List[str]]:
+        """
+        Generates N test cases
+
+        Args:
+            N: Number of test cases
+            sink: Where each test case is sent instead of being returned
+                a binary file object: every case is streamed into it, one after another
+                a str: a path formatted with the case number, each case is streamed
+                    into its own file, e.g. "data/{}.in"
+                a callable: called with (case_num, output) once each case is done
+            seed: Master seed, every case draws from its own RandomContext(seed, case_num)
+                so any case can be regenerated on its own, without the global
+                random state being touched
+            workers: Number of processes to generate cases in, None uses every core.
+                Cases are seeded when there's more than one worker, the output is the
+                same for any number of workers given the same seed
+
+        Returns:
+            The output of every test case, or None if a sink is given
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers > 1 and seed is None:
+            seed = random.randint(0, (1 << 64) - 1)
+
+        path = sink if isinstance(sink, str) else None
+        if workers > 1:
+            # Only imported when it's used, it adds to the import time of tcgen
+            from concurrent.futures import ProcessPoolExecutor
+
+            jobs = [(case_num, seed, path) for case_num in range(N)]
+            with ProcessPoolExecutor(
+                workers,
+                mp_context=_pool_context(),
+                initializer=_init_worker,
+                initargs=(self,),
+            ) as pool:
+                return self._send_outputs(pool.map(_run_worker_case, jobs), sink)
+
+        if sink is None or callable(sink):
+            outputs = (self._run_case(case_num, seed) for case_num in range(N))
+            return self._send_outputs(outputs, sink)
+        for case_num in range(N):
+            fp = None if path is not None else sink
+            self._run_case(case_num, seed, path, fp)
+        return None
+
+    def _send_outputs(self, outputs, sink):
+        """Sends outputs, in case order, to the sink given to get_test_cases"""
+        if sink is None:
+            return list(outputs)
+        for case_num, output in enumerate(outputs):
+            if callable(sink):
+                sink(case_num, output)
+            elif not isinstance(sink, str):
+                sink.write(output.encode())
+        return None
+
     def get_test_case(self):
-        self.output = ""
-        self.generate(1)
-        return self.output
+        return self._get_output(1)
+
+    def write_test_case(self, fp: typing.BinaryIO, case_num: int = 1) -> None:
+        """
+        Generates a test case straight into a binary file object
+
+        Datatypes are written in chunks, so the case is never held as one string
+
+        Args:
+            fp: Binary file object, ideally buffered
+            case_num: Passed on to generate
+        """
+        self._fp = fp
+        try:
+            self.generate(case_num)
+        finally:
+            self._fp = None
+
+
+def _is_generator_class(value) -> bool:
+    """Whether value is a concrete Generator subclass defined in the loaded file"""
+    if not isinstance(value, type) or not issubclass(value, Generator):
+        return False
+    return value.__module__ == "__tcgen__" and not value.__abstractmethods__
+
+
+def _is_main_guard(node) -> bool:
+    """Whether node is an if __name__ == "__main__": block"""
+    import ast
+
+    if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+        return False
+    operands = [node.test.left, *node.test.comparators]
+    if len(operands) != 2 or not isinstance(node.test.ops[0], ast.Eq):
+        return False
+    names = [x.id for x in operands if isinstance(x, ast.Name)]
+    values = [x.value for x in operands if isinstance(x, ast.Constant)]
+    return names == ["__name__"] and values == ["__main__"]
+
+
+def _only_defines(tree) -> bool:
+    """
+    Whether the top level of a file only defines things: imports, functions,
+    classes, assignments without calls, docstrings and an if __name__ == "__main__":
+    block. Anything else, e.g. print(gen.get_test_case()), has side effects
+    """
+    import ast
+
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)):
+            continue
+        if _is_main_guard(node):
+            continue
+        if isinstance(node, (ast.Assign, ast.AnnAssign, ast.Expr)):
+            if not any(isinstance(child, ast.Call) for child in ast.walk(node)):
+                continue
+        return False
+    return True
+
+
+def load_generator(pathname: str) -> typing.Optional[Generator]:
+    """
+    Returns an instance of the last concrete Generator subclass defined in a file
+
+    The file is run once, not as __main__ so a guarded get_test_cases() doesn't
+    run. Only files whose top level just defines things are run: anything else,
+    e.g. an unguarded print(gen.get_test_case()), makes the file a script that
+    prints a case every time it runs, like a file without a class statement
+
+    Returns:
+        The generator, None if the file doesn't define one or is a script
+    """
+    import ast
+    import runpy
+    import sys
+
+    # So the file can import the modules next to it
+    sys.path.insert(0, os.path.dirname(os.path.abspath(pathname)))
+    with open(pathname) as f:
+        tree = ast.parse(f.read(), pathname)
+    if not any(isinstance(node, ast.ClassDef) for node in tree.body) or not _only_defines(tree):
+        return None
+    module = runpy.run_path(pathname, run_name="__tcgen__")
+    classes = [value for value in module.values() if _is_generator_class(value)]
+    return classes[-1]() if classes else None
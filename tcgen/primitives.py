@@ -1,6 +1,8 @@
 from tcgen.utils.constants import LOWERCASE
 from tcgen.utils import random, InvalidRangeException
-import sympy
+from tcgen.utils.random import BLOCK_SIZE, _bounds, _float_bounds, _rng
+from tcgen.utils import primes
+import functools
 import logging
 import typing
 
@@ -15,16 +17,22 @@ __all__ = [
 
 
 class InclusiveMixin:
+    __slots__ = ()
+
     def inclusive(self):
         self._inclusive = True
+        self._invalidate()
         return self
 
     def exclusive(self):
         self._inclusive = False
+        self._invalidate()
         return self
 
 
 class SortableMixin:
+    __slots__ = ()
+
     def _total_values(self):
         """Returns the number of possible values it can generate"""
         raise NotImplementedError
@@ -36,13 +44,28 @@ class SortableMixin:
         """
         raise NotImplementedError
 
+    def _kth_smallest_many(self, ks):
+        """
+        Returns the kth smallest value for every k in ks
+        ks must be sorted, 1 <= k <= self._total_values()
+        """
+        return [self._kth_smallest(k) for k in ks]
+
+    def _check_ranks(self, ks):
+        # ks is sorted so only the ends need to be checked
+        if len(ks) and (ks[0] < 1 or ks[-1] > self._total_values()):
+            raise IndexError("k outside of bounds")
+
 
 class ArithmeticMixin:
+    __slots__ = ()
+
     def __add__(self, val):
         if self.is_generated:
             return self.value + val
         self.L += val
         self.U += val
+        self._invalidate()
         return self
 
     __radd__ = __add__
@@ -52,6 +75,7 @@ class ArithmeticMixin:
             return self.value - val
         self.L -= val
         self.U -= val
+        self._invalidate()
         return self
 
     __rsub__ = __sub__
@@ -61,6 +85,7 @@ class ArithmeticMixin:
             return self.value * val
         self.L *= val
         self.U *= val
+        self._invalidate()
         return self
 
     __rmul__ = __mul__
@@ -70,20 +95,26 @@ class ArithmeticMixin:
             return self.value / val
         self.L //= val
         self.U //= val
+        self._invalidate()
         return self
 
     __truediv__ = __floordiv__
 
 
 class Primitive:
-    L = None
-    U = None
-    _inclusive = None
+    # Primitives are created in bulk, slots keep each one small.
+    # _compiled is (sample, sample_many) from _compile, dropped whenever the bounds change
+    __slots__ = ("L", "U", "_inclusive", "weighted", "value", "wcnt", "_compiled")
 
     def __init__(self, wcnt: int = None, **kwargs):
         if kwargs:
             logging.warning("Recieved extra kwargs: " + str(kwargs))
 
+        # Subclasses set these before calling __init__, if they have bounds at all
+        for name in ("L", "U", "_inclusive"):
+            if not hasattr(self, name):
+                setattr(self, name, None)
+
         if self.L and self.U:
             if self._inclusive is not None:
                 if self._inclusive and self.L > self.U:
@@ -93,6 +124,7 @@ class Primitive:
         self.weighted = bool(wcnt)
         self.value = None
         self.wcnt = wcnt
+        self._invalidate()
 
     @property
     def is_generated(self):
@@ -104,27 +136,92 @@ class Primitive:
     def _generate_weighted_value(self, **kwargs):
         raise NotImplementedError
 
+    def _generate_values(self, N, **kwargs):
+        """Returns N values, primitives with a batch random should override this"""
+        values = []
+        for _ in range(N):
+            self._generate_value(**kwargs)
+            values.append(self.value)
+        return values
+
+    def _generate_weighted_values(self, N, **kwargs):
+        values = []
+        for _ in range(N):
+            self._generate_weighted_value(**kwargs)
+            values.append(self.value)
+        return values
+
     def val(self):
         raise NotImplementedError
 
     def default(self):
         raise NotImplementedError
 
-    def _generate(self):
+    def _generate_kwargs(self):
         kwargs = {}
         if self._inclusive is not None:
             kwargs["inclusive"] = self._inclusive
+        if self.weighted and self.wcnt:
+            kwargs["wcnt"] = self.wcnt
+        return kwargs
 
+    def _compile(self):
+        """
+        Returns (sample, sample_many), functions that draw one value and a list
+        of N values with the bounds and weighting already resolved
+
+        Primitives with a faster way to draw a single value should override this
+        """
+        kwargs = self._generate_kwargs()
         if self.weighted:
-            logging.debug("Generating weighted value")
-            if self.wcnt:
-                kwargs["wcnt"] = self.wcnt
-            self._generate_weighted_value(**kwargs)
+            generate, generate_many = self._generate_weighted_value, self._generate_weighted_values
         else:
-            logging.debug("Generating value")
-            self._generate_value(**kwargs)
+            generate, generate_many = self._generate_value, self._generate_values
+
+        def sample():
+            generate(**kwargs)
+            return self.value
+
+        return sample, functools.partial(generate_many, **kwargs)
+
+    def _samplers(self):
+        if self._compiled is None:
+            logging.debug(f"Compiling samplers for {self.__class__.__name__}")
+            self._compiled = self._compile()
+        return self._compiled
+
+    def _invalidate(self):
+        """Drops the compiled samplers, needed whenever the bounds or weighting change"""
+        self._compiled = None
+
+    def _generate(self):
+        self.value = self._samplers()[0]()
         return self.value
 
+    def _generate_many(self, N, lo=0, hi=None):
+        """
+        Generates N values in one go, the last one is kept as the value
+
+        Used by datatypes so each element doesn't pay for a _generate() call.
+        Only values [lo, hi) are returned if given, in a random context only
+        the blocks of BLOCK_SIZE values they're in are drawn
+        """
+        hi = N if hi is None else hi
+        draw = self._samplers()[1]
+        stream = random.next_stream()
+        if stream is None:
+            values = draw(N)[lo:hi]
+        else:
+            values = []
+            for block in range(lo // BLOCK_SIZE, -(-hi // BLOCK_SIZE)):
+                start = block * BLOCK_SIZE
+                with stream.substream(block):
+                    chunk = draw(min(BLOCK_SIZE, N - start))
+                values.extend(chunk[max(lo - start, 0):hi - start])
+        if values:
+            self.value = values[-1]
+        return values
+
     def __str__(self):
         if not self.is_generated:
             self._generate()
@@ -132,6 +229,8 @@ class Primitive:
 
 
 class Integer(Primitive, InclusiveMixin, ArithmeticMixin, SortableMixin):
+    __slots__ = ()
+
     def __init__(
         self,
         *args: int,
@@ -155,9 +254,26 @@ class Integer(Primitive, InclusiveMixin, ArithmeticMixin, SortableMixin):
     def _generate_weighted_value(self, **kwargs):
         self.value = random.wrandint(self.L, self.U, **kwargs)
 
+    def _generate_weighted_values(self, N, **kwargs):
+        return random.wrandints(self.L, self.U, N, **kwargs)
+
     def _generate_value(self, **kwargs):
         self.value = random.randint(self.L, self.U, **kwargs)
 
+    def _generate_values(self, N, **kwargs):
+        return random.randints(self.L, self.U, N, **kwargs)
+
+    def _compile(self):
+        if self.weighted:
+            return super()._compile()
+        L, U = _bounds(self.L, self.U, self._inclusive)
+        U += 1
+
+        def sample():
+            return _rng().randrange(L, U)
+
+        return sample, functools.partial(random.randints, L, U - 1)
+
     def _total_values(self):
         if self._inclusive:
             return self.U - self.L + 1
@@ -170,6 +286,11 @@ class Integer(Primitive, InclusiveMixin, ArithmeticMixin, SortableMixin):
             return self.L + k - 1
         return self.L + k
 
+    def _kth_smallest_many(self, ks):
+        self._check_ranks(ks)
+        offset = self.L - 1 if self._inclusive else self.L
+        return [offset + k for k in ks]
+
     def default(self):
         return 0
 
@@ -210,34 +331,44 @@ class Integer(Primitive, InclusiveMixin, ArithmeticMixin, SortableMixin):
 
 
 class Prime(Integer):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         Integer.__init__(self, *args, **kwargs)
-        # To raise error
-        random.randprime(self.L, self.U)
+        L, U = self._bounds()
+        if not primes.has_prime(L, U):
+            raise ValueError(f"There are no primes between {L} and {U}")
+
+    def _bounds(self):
+        """The inclusive bounds of the range"""
+        if self._inclusive:
+            return self.L, self.U
+        return self.L + 1, self.U - 1
 
     def _generate_weighted_value(self, **kwargs):
         self.value = random.wrandprime(self.L, self.U, **kwargs)
 
+    def _generate_weighted_values(self, N, **kwargs):
+        return random.wrandprimes(self.L, self.U, N, **kwargs)
+
     def _generate_value(self, **kwargs):
         self.value = random.randprime(self.L, self.U, **kwargs)
 
-    def _total_values(self):
-        """
-        Get number of primes between range
+    def _generate_values(self, N, **kwargs):
+        return random.randprimes(self.L, self.U, N, **kwargs)
 
-        !! Slow function !!
-        """
-        if self._inclusive:
-            return len(list(sympy.primerange(self.L, self.U + 1)))
-        return len(list(sympy.primerange(self.L + 1, self.U)))
+    # Drawing a prime is all table lookups, there's nothing to specialise
+    _compile = Primitive._compile
+
+    def _total_values(self):
+        """Get number of primes between range"""
+        return primes.count_primes(*self._bounds())
 
     def _kth_smallest(self, k: int):
-        if k < 1 or k > self._total_values():
-            raise IndexError("k outside of bounds")
-        # TODO: take advantage of generator to reduce from all primes generated, only the first k primes
-        if self._inclusive:
-            return list(sympy.primerange(self.L, self.U + 1))[k - 1]
-        return list(sympy.primerange(self.L + 1, self.U))[k - 1]
+        return primes.kth_prime(*self._bounds(), k)
+
+    def _kth_smallest_many(self, ks):
+        return primes.kth_primes(*self._bounds(), ks)
 
     def val(self):
         return super().val()
@@ -246,6 +377,8 @@ class Prime(Integer):
 
 
 class Bool(Integer):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         Integer.__init__(self, 0, 1, **kwargs)
 
@@ -261,6 +394,8 @@ class Bool(Integer):
 
 
 class Float(Primitive, InclusiveMixin, ArithmeticMixin, SortableMixin):
+    __slots__ = ("places",)
+
     def __init__(
         self,
         *args: float,
@@ -286,9 +421,27 @@ class Float(Primitive, InclusiveMixin, ArithmeticMixin, SortableMixin):
     def _generate_weighted_value(self, **kwargs):
         self.value = random.wrandfloat(self.L, self.U, places=self.places, **kwargs)
 
+    def _generate_weighted_values(self, N, **kwargs):
+        return random.wrandfloats(self.L, self.U, self.places, N, **kwargs)
+
     def _generate_value(self, **kwargs):
         self.value = random.randfloat(self.L, self.U, places=self.places, **kwargs)
 
+    def _generate_values(self, N, **kwargs):
+        return random.randfloats(self.L, self.U, self.places, N, **kwargs)
+
+    def _compile(self):
+        if self.weighted:
+            return super()._compile()
+        L_i, U_i = _float_bounds(self.L, self.U, self.places, self._inclusive)
+        U_i += 1
+        scale = 10**self.places
+
+        def sample():
+            return _rng().randrange(L_i, U_i) / scale
+
+        return sample, functools.partial(self._generate_values, **self._generate_kwargs())
+
     def _total_values(self):
         L_i = int(self.L * 10**self.places)
         U_i = int(self.U * 10**self.places)
@@ -304,6 +457,14 @@ class Float(Primitive, InclusiveMixin, ArithmeticMixin, SortableMixin):
             return (L_i + k - 1) / (10**self.places)
         return (L_i + k) / (10**self.places)
 
+    def _kth_smallest_many(self, ks):
+        self._check_ranks(ks)
+        offset = int(self.L * 10**self.places)
+        if self._inclusive:
+            offset -= 1
+        scale = 10**self.places
+        return [(offset + k) / scale for k in ks]
+
     def __str__(self):
         super().__str__()
         fmt = "{:." + str(self.places) + "f}"
@@ -326,6 +487,8 @@ class Float(Primitive, InclusiveMixin, ArithmeticMixin, SortableMixin):
 
 
 class Char(Primitive):
+    __slots__ = ("char_set", "priority")
+
     def __init__(
         self, char_set: str = LOWERCASE, priority: typing.List[int] = [], **kwargs
     ):
@@ -364,16 +527,40 @@ class Char(Primitive):
             for k, v in enumerate(priority):
                 self.priority[v - 1] = k + 1
         else:
-            self.priority = list(range(1, len(char_set) + 1))
+            self.priority = range(1, len(char_set) + 1)
 
         Primitive.__init__(self, **kwargs)
 
     def _generate_weighted_value(self, **kwargs):
         self.value = random.wchoice(self.char_set, self.priority, **kwargs)
 
+    def _generate_weighted_values(self, N, **kwargs):
+        return random.wchoices(self.char_set, self.priority, N, **kwargs)
+
     def _generate_value(self, **kwargs):
         self.value = random.choice(self.char_set, **kwargs)
 
+    def _generate_values(self, N, **kwargs):
+        return random.choices(self.char_set, N, **kwargs)
+
+    def _compile(self):
+        if self.weighted:
+            return super()._compile()
+        char_set, n = self.char_set, len(self.char_set)
+
+        def sample():
+            return char_set[_rng().randrange(n)]
+
+        return sample, functools.partial(random.choices, char_set)
+
+    def _generate_string(self, N, as_bytes=False):
+        """Generates a string of N characters in one go"""
+        if self.weighted:
+            return random.wrandstring(
+                self.char_set, self.priority, N, wcnt=self.wcnt, as_bytes=as_bytes
+            )
+        return random.randstring(self.char_set, N, as_bytes=as_bytes)
+
     def default(self):
         return self.char_set[0]
 
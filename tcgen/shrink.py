@@ -0,0 +1,547 @@
+from tcgen.datatypes import (
+    Array,
+    Graph,
+    Grid,
+    KRegularTree,
+    NonDecreasing,
+    Permutation,
+    String,
+    Tree,
+)
+from tcgen.generator import Generator
+from tcgen.primitives import Integer, Prime, Primitive
+from tcgen.stress import Failure, compare_tokens
+from tcgen.utils.solution import solution_command
+import os
+import tempfile
+import typing
+
+__all__ = [
+    "shrink",
+]
+
+# A failing case is recorded as the arguments of every p() call. Sizes printed
+# in the case, like N in `p(N); p(Array(N))`, are tied to the datatypes built
+# from them by identity, so dropping an element also lowers the N printed.
+# Datatypes whose size isn't printed keep their size, only their values shrink.
+#
+# Reductions, tried until none of them makes progress:
+#   every printed size has the units it counts removed with delta debugging,
+#       elements of arrays and strings, nodes of graphs, edges of graphs that
+#       aren't trees, rows and columns of grids. Graphs are relabelled 1 to N
+#       after nodes are removed, candidates that break a tree or a connected
+#       graph are dropped without running anything
+#   Integer values and weights are moved towards 0, staying within their bounds
+# Then the nodes of each graph are relabelled in the order they first appear.
+# Every candidate is run on the solution and the brute force, candidates are
+# tried workers at a time and the first one in order that still fails the same
+# way is kept.
+
+
+class _Slot:
+    """One argument of a p() call"""
+
+    __slots__ = ("kind", "obj", "dims")
+
+    def __init__(self, kind, obj, dims):
+        # One of text, int, seq, string, perm, sorted, graph, grid
+        self.kind = kind
+        self.obj = obj
+        # Axis to the index of the slot printing its size
+        self.dims = dims
+
+
+# The attributes holding the sizes of each kind, with the units they count
+_AXES = {
+    "seq": (("len", "N"),),
+    "sorted": (("len", "N"),),
+    "string": (("len", "N"),),
+    "perm": (("len", "N"),),
+    "graph": (("nodes", "N"), ("edges", "M")),
+    "grid": (("rows", "H"), ("cols", "W")),
+}
+
+
+def _kind(arg) -> str:
+    if isinstance(arg, Primitive):
+        return "int" if isinstance(arg, Integer) and not isinstance(arg, Prime) else "text"
+    if isinstance(arg, String):
+        return "string"
+    if isinstance(arg, Permutation):
+        return "perm"
+    if isinstance(arg, NonDecreasing):
+        return "sorted"
+    if isinstance(arg, Array):
+        return "seq"
+    if isinstance(arg, Graph):
+        return "graph"
+    if isinstance(arg, Grid):
+        return "grid"
+    if isinstance(arg, int) and not isinstance(arg, bool):
+        return "int"
+    return "text"
+
+
+def _snapshot(slot: _Slot):
+    """The value of the argument as it was printed"""
+    obj = slot.obj
+    if slot.kind == "int":
+        return int(obj.value) if isinstance(obj, Primitive) else obj
+    if slot.kind == "text":
+        return str(obj)
+    if slot.kind == "string":
+        return obj.value.decode() if obj.as_bytes else obj.value
+    if slot.kind == "graph":
+        return list(obj.value)
+    if slot.kind == "grid":
+        return [list(row) for row in obj.value]
+    return list(obj.value)
+
+
+def _bounds(prim) -> typing.Optional[typing.Tuple[int, int]]:
+    """Bounds of an Integer, None for anything else"""
+    if not isinstance(prim, Integer) or isinstance(prim, Prime):
+        return None
+    L, U = int(prim.L), int(prim.U)
+    return (L, U) if prim._inclusive else (L + 1, U - 1)
+
+
+def _target(bounds) -> int:
+    """The value closest to 0 within bounds"""
+    return min(max(0, bounds[0]), bounds[1])
+
+
+def _render(slots, lines, state) -> str:
+    out = []
+    for line in lines:
+        out.append(" ".join(_render_slot(slots[idx], state[idx]) for idx in line))
+        out.append("\n")
+    return "".join(out)
+
+
+def _render_slot(slot: _Slot, value) -> str:
+    # The same text the datatypes print
+    if slot.kind in ("int", "text", "string"):
+        return str(value)
+    if slot.kind == "graph":
+        fmt = "{} {} {}" if slot.obj.weighted else "{} {}"
+        return "\n".join(fmt.format(*edge) for edge in value)
+    if slot.kind == "grid":
+        sep = " " if slot.obj.space_seperated else ""
+        return "\n".join(sep.join(map(str, row)) for row in value)
+    return " ".join(map(str, value))
+
+
+def _category(reason: str) -> str:
+    """The kind of failure, without the exit code and stderr"""
+    return reason.split("\n")[0].split(" with ")[0]
+
+
+def _connected(N: int, edges) -> bool:
+    parent = list(range(N + 1))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    parts = N
+    for edge in edges:
+        a, b = find(edge[0]), find(edge[1])
+        if a != b:
+            parent[a] = b
+            parts -= 1
+    return parts <= 1
+
+
+def _valid_graph(obj: Graph, N: int, edges) -> bool:
+    if isinstance(obj, Tree):
+        if len(edges) != max(N - 1, 0) or not _connected(N, edges):
+            return False
+        if isinstance(obj, KRegularTree):
+            degree = [0] * (N + 1)
+            for edge in edges:
+                degree[edge[0]] += 1
+                degree[edge[1]] += 1
+            return max(degree) <= obj.k + 1
+        return True
+    return not obj.connected or _connected(N, edges)
+
+
+class _Shrinker:
+    def __init__(self, generator, failure, solution, brute, checker, workers, timeout):
+        self.seed = failure.seed
+        self.iteration = failure.iteration
+        self.solution = solution_command(solution)
+        self.brute = solution_command(brute)
+        self.checker = checker or compare_tokens
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.runs = 0
+        # Input text to (failure, output, expected), the failure is None if it passes
+        self._cache = {}
+        self._record(generator, failure)
+
+    def _record(self, generator: Generator, failure: Failure):
+        slots, lines, state = [], [], []
+
+        def find_dim(size):
+            if isinstance(size, Primitive):
+                return next((idx for idx, slot in enumerate(slots) if slot.obj is size), None)
+            if isinstance(size, int):
+                # Small ints are shared objects, so only a single match can be trusted
+                found = [idx for idx, slot in enumerate(slots) if slot.kind == "int" and slot.obj is size]
+                return found[0] if len(found) == 1 else None
+            return None
+
+        def p(*args):
+            line = []
+            for arg in args:
+                kind = _kind(arg)
+                dims = {}
+                for axis, attr in _AXES.get(kind, ()):
+                    dim = find_dim(getattr(arg, attr))
+                    if dim is not None:
+                        dims[axis] = dim
+                line.append(len(slots))
+                slots.append(_Slot(kind, arg, dims))
+            lines.append(line)
+            original_p(*args)
+            state.extend(_snapshot(slots[idx]) for idx in line)
+
+        original_p = generator.p
+        generator.p = generator.print = p
+        try:
+            generated = generator._run_case(self.iteration, self.seed)
+        finally:
+            del generator.p, generator.print
+
+        self.slots, self.lines, self.state = slots, lines, state
+        if _render(slots, lines, state) != generated or generated != failure.input:
+            raise ValueError("The generator doesn't give the same input for the failing iteration")
+
+        # Every slot printing a size, and the slots whose sizes it is
+        self.dims = {}
+        for idx, slot in enumerate(slots):
+            for axis, dim in slot.dims.items():
+                self.dims.setdefault(dim, []).append((idx, axis))
+        # Slots printing a size, they only change with what they're the size of
+        self.sizes = set(self.dims)
+        for dim in self.dims:
+            # The same primitive printed more than once is one size
+            obj = slots[dim].obj
+            copies = [
+                idx for idx, slot in enumerate(slots)
+                if idx != dim and slot.obj is obj and isinstance(obj, Primitive)
+            ]
+            self.sizes.update(copies)
+            self.dims[dim] = [(idx, "copy") for idx in copies] + self.dims[dim]
+
+    def _dim_bounds(self, dim):
+        bounds = _bounds(self.slots[dim].obj)
+        return bounds or (1, float("inf"))
+
+    # Candidates, each returns a new state or None when it isn't a valid input
+
+    def _remove(self, state, dim, removed, skip=None):
+        """Removes the units of a size at the indices in removed, from everything it's the size of"""
+        removed = set(removed)
+        size = state[dim] - len(removed)
+        L, U = self._dim_bounds(dim)
+        if not removed or not L <= size <= U:
+            return None
+        keep = [idx for idx in range(state[dim]) if idx not in removed]
+        state = list(state)
+        state[dim] = size
+        for idx, axis in self.dims[dim]:
+            if idx == skip:
+                continue
+            slot, value = self.slots[idx], state[idx]
+            if axis == "copy":
+                state[idx] = size
+            elif axis == "len":
+                if slot.kind == "string":
+                    state[idx] = "".join(value[i] for i in keep)
+                elif slot.kind == "perm":
+                    kept = [value[i] for i in keep]
+                    rank = {val: r for r, val in enumerate(sorted(kept), 1)}
+                    state[idx] = [rank[val] for val in kept]
+                else:
+                    state[idx] = [value[i] for i in keep]
+            elif axis == "rows":
+                state[idx] = [value[i] for i in keep]
+            elif axis == "cols":
+                state[idx] = [[row[i] for i in keep] for row in value]
+            elif axis == "edges":
+                if isinstance(slot.obj, Tree):
+                    return None
+                state[idx] = [value[i] for i in keep]
+            elif axis == "nodes":
+                state = self._remove_nodes(state, idx, keep)
+                if state is None:
+                    return None
+        for idx, axis in self.dims[dim]:
+            if axis in ("nodes", "edges") and idx != skip:
+                if not _valid_graph(self.slots[idx].obj, self._nodes(idx, state), state[idx]):
+                    return None
+        return state
+
+    def _nodes(self, idx, state):
+        slot = self.slots[idx]
+        if "nodes" in slot.dims:
+            return state[slot.dims["nodes"]]
+        return int(slot.obj.N)
+
+    def _remove_nodes(self, state, idx, keep):
+        """Removes every node of a graph not in keep, which holds 0-indexed nodes"""
+        label = {node + 1: new for new, node in enumerate(keep, 1)}
+        edges = state[idx]
+        kept = [i for i, edge in enumerate(edges) if edge[0] in label and edge[1] in label]
+        state[idx] = [(label[edges[i][0]], label[edges[i][1]]) + tuple(edges[i][2:]) for i in kept]
+        if len(kept) == len(edges):
+            return state
+        dim = self.slots[idx].dims.get("edges")
+        if dim is None:
+            # The number of edges can't change unless it's printed, or it's a tree
+            return state if isinstance(self.slots[idx].obj, Tree) else None
+        kept_set = set(kept)
+        return self._remove(state, dim, [i for i in range(len(edges)) if i not in kept_set], skip=idx)
+
+    def _lower(self, state, idx, positions):
+        """Moves the values at positions towards 0"""
+        slot = self.slots[idx]
+        if slot.kind == "graph":
+            target = _target(_bounds(slot.obj.W))
+            value = list(state[idx])
+            changed = False
+            for i in positions:
+                if value[i][2] != target:
+                    value[i] = value[i][:2] + (target,)
+                    changed = True
+        else:
+            target = _target(_bounds(slot.obj._type))
+            value = list(state[idx])
+            changed = any(value[i] != target for i in positions)
+            for i in positions:
+                value[i] = target
+        if not changed:
+            return None
+        state = list(state)
+        state[idx] = value
+        return state
+
+    def _set(self, state, idx, value):
+        state = list(state)
+        state[idx] = value
+        return state
+
+    # Running candidates
+
+    def _verdicts(self, texts) -> typing.List[typing.Optional[str]]:
+        """The failure of every input, None for the ones that pass"""
+        return [self._run(texts)[text][0] for text in texts]
+
+    def _run(self, texts) -> dict:
+        """Runs every input not run yet, returns the cache of (failure, output, expected)"""
+        todo = [text for text in dict.fromkeys(texts) if text not in self._cache]
+        if todo:
+            # Only imported when shrinking, asyncio adds to the import time
+            from tcgen.utils.executor import Executor, Job
+
+            with tempfile.TemporaryDirectory() as tmp:
+                jobs = []
+                for num, text in enumerate(todo):
+                    path = os.path.join(tmp, str(num))
+                    with open(path + ".in", "w") as f:
+                        f.write(text)
+                    jobs.append(Job(self.solution, path + ".in", path + ".out", timeout=self.timeout))
+                    jobs.append(Job(self.brute, path + ".in", path + ".ans", timeout=self.timeout))
+                results = Executor(self.workers).run(jobs)
+                self.runs += len(todo)
+                for num, text in enumerate(todo):
+                    self._cache[text] = self._judge(text, results[2 * num], results[2 * num + 1])
+        return self._cache
+
+    def _judge(self, text, sol, brute):
+        outputs = [None, None]
+        for num, (name, result) in enumerate((("Solution", sol), ("Brute force", brute))):
+            if result.timed_out:
+                return (f"{name} timed out", *outputs)
+            if result.returncode != 0:
+                return (f"{name} exited with {result.returncode}\n\n{result.stderr}", *outputs)
+            with open(result.job.stdout) as f:
+                outputs[num] = f.read()
+        output, expected = outputs
+        return None if self.checker(text, output, expected) else "Wrong answer", output, expected
+
+    def _first_failing(self, candidates) -> typing.Optional[int]:
+        """Index of the first candidate that fails the same way as the input"""
+        texts = [_render(self.slots, self.lines, state) for state in candidates]
+        for idx, verdict in enumerate(self._verdicts(texts)):
+            if verdict is not None and _category(verdict) == _category(self.reason):
+                return idx
+        return None
+
+    # Reductions
+
+    def _ddmin(self, state, count, apply):
+        """
+        Delta debugging, removes chunks of units while the input still fails,
+        halving the chunk size whenever no chunk can be removed
+
+        Args:
+            count: Number of units in a state
+            apply: Called with (state, indices), the state without those units
+        """
+        n = count(state)
+        chunk = max(n // 2, 1)
+        progress = False
+        while True:
+            pos = 0
+            while pos < count(state):
+                n = count(state)
+                candidates, starts = [], []
+                start = pos
+                while len(candidates) < self.workers and start < n:
+                    candidate = apply(state, range(start, min(start + chunk, n)))
+                    if candidate is not None:
+                        candidates.append(candidate)
+                        starts.append(start)
+                    start += chunk
+                hit = self._first_failing(candidates) if candidates else None
+                if hit is None:
+                    pos = start
+                    continue
+                progress = True
+                state = candidates[hit]
+                # Removed units shift the rest back, anything else moves on
+                pos = starts[hit] if count(state) < n else starts[hit] + chunk
+            if chunk == 1:
+                return state, progress
+            chunk //= 2
+
+    def _search(self, state, idx, target):
+        """Moves an int as close to target as it can go while the input still fails"""
+        lo, hi = target, state[idx]
+        if lo == hi:
+            return state, False
+        # The value at hi fails, the one at lo is tried first
+        candidate = self._set(state, idx, lo)
+        if self._first_failing([candidate]) == 0:
+            return candidate, True
+        progress = False
+        while abs(hi - lo) > 1:
+            step = (hi - lo) / (self.workers + 1)
+            points = list(dict.fromkeys(
+                val for val in (lo + round(step * j) for j in range(1, self.workers + 1)) if val not in (lo, hi)
+            ))
+            if not points:
+                break
+            hit = self._first_failing([self._set(state, idx, val) for val in points])
+            if hit is None:
+                lo = points[-1]
+            else:
+                hi, progress = points[hit], True
+                if hit:
+                    lo = points[hit - 1]
+        return self._set(state, idx, hi), progress
+
+    def _relabel(self, state, idx):
+        """Relabels the nodes of a graph in the order they first appear"""
+        slot = self.slots[idx]
+        if slot.obj._acyclic:
+            return None
+        label = {}
+        for edge in state[idx]:
+            for node in edge[:2]:
+                label.setdefault(node, len(label) + 1)
+        for node in range(1, self._nodes(idx, state) + 1):
+            label.setdefault(node, len(label) + 1)
+        edges = [(label[edge[0]], label[edge[1]]) + tuple(edge[2:]) for edge in state[idx]]
+        return None if edges == state[idx] else self._set(state, idx, edges)
+
+    @staticmethod
+    def _lowerable(slot: _Slot) -> bool:
+        """Whether the slot holds Integers that can be moved towards 0 one by one"""
+        if slot.kind == "seq":
+            return _bounds(slot.obj._type) is not None
+        return slot.kind == "graph" and slot.obj.weighted and _bounds(slot.obj.W) is not None
+
+    def run(self):
+        text = _render(self.slots, self.lines, self.state)
+        self.reason = self._verdicts([text])[0]
+        if self.reason is None:
+            raise ValueError("The failing input passes when run again")
+
+        state = self.state
+        progress = True
+        while progress:
+            progress = False
+            for dim in self.dims:
+                state, found = self._ddmin(
+                    state, lambda state, dim=dim: state[dim],
+                    lambda state, removed, dim=dim: self._remove(state, dim, removed),
+                )
+                progress |= found
+            for idx, slot in enumerate(self.slots):
+                if not self._lowerable(slot):
+                    continue
+                state, found = self._ddmin(
+                    state, lambda state, idx=idx: len(state[idx]),
+                    lambda state, positions, idx=idx: self._lower(state, idx, positions),
+                )
+                progress |= found
+            for idx, slot in enumerate(self.slots):
+                bounds = _bounds(slot.obj)
+                if slot.kind == "int" and idx not in self.sizes and bounds is not None:
+                    state, found = self._search(state, idx, _target(bounds))
+                    progress |= found
+
+        for idx, slot in enumerate(self.slots):
+            if slot.kind == "graph":
+                candidate = self._relabel(state, idx)
+                if candidate is not None and self._first_failing([candidate]) == 0:
+                    state = candidate
+        return state
+
+
+def shrink(
+    generator: Generator,
+    failure: Failure,
+    solution: str,
+    brute: str,
+    checker: typing.Callable[[str, str, str], bool] = None,
+    *,
+    workers: typing.Optional[int] = None,
+    timeout: typing.Optional[float] = 10,
+) -> typing.Tuple[Failure, int]:
+    """
+    Shrinks the input of a failure found by stress, keeping it failing the same way
+
+    The generator is run again for the failing iteration, recording what it
+    prints, then arrays and strings lose elements, graphs lose nodes and edges,
+    grids lose rows and columns and Integers move towards 0. Sizes printed in
+    the input are kept in step, see the comment at the top of tcgen/shrink.py
+
+    Args:
+        generator: The generator given to stress
+        failure: The failure stress returned
+        solution: Source of the solution
+        brute: Source of the brute force
+        checker: The checker given to stress
+        workers: Number of candidate inputs run at once, None uses every core
+        timeout: Seconds either program can run for on one input
+
+    Returns:
+        The failure for the smallest input found, and the number of inputs run
+
+    Raises:
+        ValueError: where the generator doesn't give the failing input again,
+            or the input doesn't fail anymore
+    """
+    shrinker = _Shrinker(generator, failure, solution, brute, checker, workers, timeout)
+    state = shrinker.run()
+    text = _render(shrinker.slots, shrinker.lines, state)
+    reason, output, expected = shrinker._run([text])[text]
+    return Failure(failure.iteration, failure.seed, reason, text, output, expected), shrinker.runs
@@ -0,0 +1,229 @@
+from tcgen.generator import Generator, _pool_context
+from tcgen.utils import random
+from tcgen.utils.random import INT64_MAX
+from tcgen.utils.solution import solution_command
+import itertools
+import os
+import subprocess
+import tempfile
+import threading
+import typing
+
+__all__ = [
+    "Failure",
+    "program_checker",
+    "stress",
+]
+
+# Seconds between progress reports
+PROGRESS_INTERVAL = 0.5
+
+# Set once when a worker starts, forked workers inherit it
+_worker = {}
+
+
+class Failure:
+    """
+    An iteration where the solution and the brute force disagreed, or where
+    either of them crashed or timed out
+
+    The input can be generated again with RandomContext(seed, iteration)
+    """
+
+    __slots__ = ("iteration", "seed", "reason", "input", "output", "expected", "path")
+
+    def __init__(self, iteration, seed, reason, input, output=None, expected=None):
+        self.iteration = iteration
+        self.seed = seed
+        self.reason = reason
+        self.input = input
+        self.output = output
+        self.expected = expected
+        # Where the input was saved, set once it is
+        self.path = None
+
+    def save(self, out_dir: str, name: str = None) -> str:
+        """
+        Writes the input, and the outputs there are, to out_dir/<name>.{in,out,ans}
+
+        The name is stress_<iteration> by default
+        """
+        path = os.path.join(out_dir, name or f"stress_{self.iteration}")
+        for suffix, text in ((".in", self.input), (".out", self.output), (".ans", self.expected)):
+            if text is not None:
+                with open(path + suffix, "w") as f:
+                    f.write(text)
+        self.path = path + ".in"
+        return self.path
+
+    def __str__(self):
+        return f"Iteration {self.iteration} with seed {self.seed}: {self.reason}"
+
+
+def compare_tokens(input: str, output: str, expected: str) -> bool:
+    """Whether both outputs are the same, ignoring whitespace"""
+    return output.split() == expected.split()
+
+
+def program_checker(filename: str) -> typing.Callable[[str, str, str], bool]:
+    """
+    A comparator that runs a checker program
+
+    The checker is run as `checker input output expected` with a path for each,
+    an exit code of 0 accepts the output, testlib checkers work as is
+    """
+    command = solution_command(filename)
+
+    def check(input: str, output: str, expected: str) -> bool:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name, text in (("input", input), ("output", output), ("expected", expected)):
+                paths.append(os.path.join(tmp, name))
+                with open(paths[-1], "w") as f:
+                    f.write(text)
+            process = subprocess.run(command + paths, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return process.returncode == 0
+
+    return check
+
+
+def _init_worker(state):
+    _worker.update(state)
+
+
+def _run(command, input: bytes, timeout):
+    """Returns the output of the command, and why it failed if it did"""
+    process = subprocess.Popen(
+        command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    # Popen.communicate polls the process when given a timeout, which takes
+    # longer than tiny cases do, so the process is killed from a timer instead
+    timed_out = []
+
+    def kill():
+        timed_out.append(True)
+        process.kill()
+
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+    try:
+        out, err = process.communicate(input)
+    finally:
+        if timer is not None:
+            timer.cancel()
+    if timed_out:
+        return None, "timed out"
+    if process.returncode != 0:
+        return None, f"exited with {process.returncode}\n\n{err.decode(errors='replace')}"
+    return out.decode(errors="replace"), None
+
+
+def _iteration(iteration: int) -> typing.Optional[Failure]:
+    seed = _worker["seed"]
+    input = _worker["generator"]._run_case(iteration, seed)
+    data = input.encode()
+    output, err = _run(_worker["solution"], data, _worker["timeout"])
+    if err is not None:
+        return Failure(iteration, seed, f"Solution {err}", input)
+    expected, err = _run(_worker["brute"], data, _worker["timeout"])
+    if err is not None:
+        return Failure(iteration, seed, f"Brute force {err}", input, output)
+    if not _worker["checker"](input, output, expected):
+        return Failure(iteration, seed, "Wrong answer", input, output, expected)
+    return None
+
+
+def _worker_loop(first: int) -> typing.Optional[Failure]:
+    """
+    Runs every step'th iteration from first until one fails, or until it's
+    past an iteration another worker found failing
+    """
+    failed, done, step, iterations = (
+        _worker["failed"], _worker["done"], _worker["step"], _worker["iterations"],
+    )
+    if iterations is None:
+        its = itertools.count(first, step)
+    else:
+        its = range(first, iterations + 1, step)
+    for iteration in its:
+        # Iterations before a failure still run, so the earliest one is always found
+        if iteration > failed.value:
+            break
+        failure = _iteration(iteration)
+        with done.get_lock():
+            done.value += 1
+        if failure is not None:
+            with failed.get_lock():
+                failed.value = min(failed.value, iteration)
+            return failure
+    return None
+
+
+def stress(
+    generator: Generator,
+    solution: str,
+    brute: str,
+    checker: typing.Callable[[str, str, str], bool] = None,
+    *,
+    iterations: typing.Optional[int] = None,
+    seed: typing.Union[None, int, str] = None,
+    workers: typing.Optional[int] = None,
+    timeout: typing.Optional[float] = 10,
+    out_dir: typing.Optional[str] = ".",
+    progress: typing.Callable[[int], None] = None,
+) -> typing.Optional[Failure]:
+    """
+    Runs the solution and a brute force on generated cases until they disagree
+
+    Iteration i runs on the case the generator gives for case_num i in
+    RandomContext(seed, i), so it can be generated again on its own
+
+    Args:
+        generator: Generator for the inputs, small cases make for fast iterations
+        solution: Source of the solution, .cpp files are compiled once
+        brute: Source of the brute force, .cpp files are compiled once
+        checker: Called with (input, output, expected), returns whether the
+            output is accepted. Outputs are compared token by token if None
+        iterations: Number of iterations, run until a failure if None
+        seed: Master seed, a random one is picked if None
+        workers: Number of processes running iterations, None uses every core
+        timeout: Seconds either program can run for on one input
+        out_dir: Where the failing input and outputs are saved, not saved if None
+        progress: Called with the number of iterations done every PROGRESS_INTERVAL seconds
+
+    Returns:
+        The earliest failing iteration, or None if every iteration passed.
+        It's the same for any number of workers given the same seed
+    """
+    if seed is None:
+        seed = random.randint(0, (1 << 64) - 1)
+    workers = workers or os.cpu_count() or 1
+    ctx = _pool_context()
+    state = {
+        "generator": generator,
+        "solution": solution_command(solution),
+        "brute": solution_command(brute),
+        "checker": checker or compare_tokens,
+        "seed": seed,
+        "timeout": timeout,
+        "iterations": iterations,
+        "step": workers,
+        "failed": ctx.Value("q", INT64_MAX),
+        "done": ctx.Value("q", 0),
+    }
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(state,)) as pool:
+        results = pool.map_async(_worker_loop, range(1, workers + 1))
+        while not results.ready():
+            results.wait(PROGRESS_INTERVAL)
+            if progress is not None:
+                progress(state["done"].value)
+        failures = [failure for failure in results.get() if failure is not None]
+
+    if not failures:
+        return None
+    failure = min(failures, key=lambda failure: failure.iteration)
+    if out_dir is not None:
+        failure.save(out_dir)
+    return failure
@@ -1 +1 @@
-from tcgen.utils.random import random, InvalidRangeException
+from tcgen.utils.random import random, InvalidRangeException, RandomContext
@@ -0,0 +1,291 @@
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+import itertools
+import typing
+
+__all__ = [
+    "CSR",
+    "EdgeList",
+    "decode_prufer",
+]
+
+INT32_MAX = (1 << 31) - 1
+
+
+def _column(chunks: typing.Iterable[list]) -> typing.Union[array, list]:
+    """Packs weights into an array when they're all ints or all floats"""
+    column = None
+    for chunk in chunks:
+        if column is None:
+            typecode = {int: "q", float: "d"}.get(type(chunk[0]) if chunk else None)
+            column = array(typecode) if typecode else []
+        size = len(column)
+        try:
+            column.extend(chunk)
+        except (TypeError, OverflowError):
+            # extend may have stopped part way through the chunk
+            column = list(column[:size])
+            column.extend(chunk)
+    return [] if column is None else column
+
+
+class EdgeList(Sequence):
+    """
+    Edges stored as parallel columns instead of a list of tuples
+
+    It behaves like the list of (u, v) or (u, v, w) tuples it replaces,
+    the columns u, v and w can be used directly for bulk work
+    """
+
+    def __init__(self, N: int):
+        typecode = "i" if N <= INT32_MAX else "q"
+        self.u = array(typecode)
+        self.v = array(typecode)
+        self.w = None
+
+    @property
+    def weighted(self):
+        return self.w is not None
+
+    def append(self, edge: typing.Tuple[int, ...]):
+        self.u.append(edge[0])
+        self.v.append(edge[1])
+        if self.weighted:
+            self.w.append(edge[2])
+
+    def extend(self, edges: typing.Iterable[typing.Tuple[int, ...]]):
+        for edge in edges:
+            self.append(edge)
+
+    def set_weights(self, weights: typing.Iterable[list]):
+        """Sets the weights from chunks of weights, in edge order"""
+        weights = _column(weights)
+        if len(weights) != len(self):
+            raise ValueError("Expected one weight for every edge")
+        self.w = weights
+
+    def __len__(self):
+        return len(self.u)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if self.weighted:
+            return (self.u[idx], self.v[idx], self.w[idx])
+        return (self.u[idx], self.v[idx])
+
+    def __setitem__(self, idx: int, edge: typing.Tuple[int, ...]):
+        self.u[idx] = edge[0]
+        self.v[idx] = edge[1]
+        if self.weighted:
+            self.w[idx] = edge[2]
+
+    def __iter__(self):
+        if self.weighted:
+            return zip(self.u, self.v, self.w)
+        return zip(self.u, self.v)
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def transform(
+        self,
+        order: typing.Sequence[int] = None,
+        label: typing.Sequence[int] = None,
+        flips: typing.Sequence[int] = None,
+    ) -> None:
+        """
+        Rewrites the columns in one pass, in place
+
+        Args:
+            order: Edge order[i] is moved to position i
+            label: Node x is renamed to label[x]
+            flips: The endpoints of edge i are swapped where flips[i] is true,
+                applied after the edges are reordered
+        """
+        u, v, w = self.u, self.v, self.w
+        if order is not None:
+            u, v = map(u.__getitem__, order), map(v.__getitem__, order)
+            if w is not None:
+                w = map(w.__getitem__, order)
+        if label is not None:
+            u, v = map(label.__getitem__, u), map(label.__getitem__, v)
+        typecode = self.u.typecode
+        u, v = array(typecode, u), array(typecode, v)
+        if flips is not None:
+            u, v = (
+                array(typecode, [y if f else x for f, x, y in zip(flips, u, v)]),
+                array(typecode, [x if f else y for f, x, y in zip(flips, u, v)]),
+            )
+        self.u, self.v = u, v
+        if w is not self.w:
+            self.w = array(self.w.typecode, w) if isinstance(self.w, array) else list(w)
+
+    def lines(self, lo: int = 0, hi: int = None) -> typing.Iterator[str]:
+        """Every edge in [lo, hi) formatted as a line, without the newline"""
+        hi = len(self) if hi is None else hi
+        if self.weighted:
+            return map("{} {} {}".format, self.u[lo:hi], self.v[lo:hi], self.w[lo:hi])
+        return map("{} {}".format, self.u[lo:hi], self.v[lo:hi])
+
+    def csr(self, N: int, directed: bool = True) -> "CSR":
+        """
+        The adjacency of nodes 1 to N in CSR form, in O(N + M)
+
+        Args:
+            N: Number of nodes
+            directed: Whether edges only go from u to v, otherwise every edge
+                is also listed as going from v to u
+        """
+        src, dst, w = self.u, self.v, self.w
+        if not directed:
+            src, dst = src + dst, dst + src
+            if w is not None:
+                w = w + w
+        # Counting sort by source, filled from the back so neighbours keep edge order
+        count = [0] * (N + 1)
+        for node in src:
+            count[node] += 1
+        offsets = list(itertools.accumulate(count, initial=0))
+        pos = offsets[1:]
+        targets = [0] * len(src)
+        if w is None:
+            weights = None
+            for node, nxt in zip(reversed(src), reversed(dst)):
+                p = pos[node] - 1
+                pos[node] = p
+                targets[p] = nxt
+        else:
+            weights = [0] * len(src)
+            for node, nxt, weight in zip(reversed(src), reversed(dst), reversed(w)):
+                p = pos[node] - 1
+                pos[node] = p
+                targets[p] = nxt
+                weights[p] = weight
+            if isinstance(w, array):
+                weights = array(w.typecode, weights)
+        targets = array(dst.typecode, targets)
+        return CSR(array("q", offsets), targets, weights)
+
+
+class CSR:
+    """
+    Compressed sparse row adjacency of nodes 1 to N
+
+    The neighbours of node x are targets[offsets[x]:offsets[x + 1]] in the
+    order of the edges they came from, with the weights in the same positions.
+    When undirected, edges listed from their v end come after those listed
+    from their u end
+    """
+
+    def __init__(self, offsets: array, targets: array, weights=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @property
+    def N(self):
+        return len(self.offsets) - 2
+
+    @property
+    def weighted(self):
+        return self.weights is not None
+
+    def degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def degrees(self) -> typing.List[int]:
+        """Degree of every node, index 0 is unused"""
+        offsets = self.offsets
+        return [0] + [offsets[x + 1] - offsets[x] for x in range(1, self.N + 1)]
+
+    def neighbours(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def edge_weights(self, node: int):
+        """Weights of the edges to neighbours(node), in the same order"""
+        return self.weights[self.offsets[node]:self.offsets[node + 1]]
+
+    def adj_list(self) -> typing.List[list]:
+        """
+        Neighbours of every node as lists, index 0 is unused
+
+        Weighted graphs get (neighbour, weight) pairs
+        """
+        ret = [[]]
+        for node in range(1, self.N + 1):
+            lo, hi = self.offsets[node], self.offsets[node + 1]
+            if self.weighted:
+                ret.append(list(zip(self.targets[lo:hi], self.weights[lo:hi])))
+            else:
+                ret.append(self.targets[lo:hi].tolist())
+        return ret
+
+    def bfs(self, source: int) -> array:
+        """Number of edges from source to every node, -1 where it can't be reached"""
+        offsets, targets = self.offsets, self.targets
+        dist = array("q", [-1]) * (self.N + 1)
+        dist[source] = 0
+        queue = [source]
+        for node in queue:
+            d = dist[node] + 1
+            for nxt in targets[offsets[node]:offsets[node + 1]]:
+                if dist[nxt] < 0:
+                    dist[nxt] = d
+                    queue.append(nxt)
+        return dist
+
+    def lines(self) -> typing.Iterator[str]:
+        """
+        Adjacency list text, line x - 1 is the degree of node x followed by its
+        neighbours, each followed by the edge's weight if weighted
+        """
+        targets, weights = self.targets, self.weights
+        for lo, hi in zip(self.offsets[1:], self.offsets[2:]):
+            vals = [hi - lo]
+            if weights is None:
+                vals.extend(targets[lo:hi])
+            else:
+                vals.extend(itertools.chain.from_iterable(zip(targets[lo:hi], weights[lo:hi])))
+            yield " ".join(map(str, vals))
+
+
+def decode_prufer(prufer: typing.Sequence[int], N: int) -> EdgeList:
+    """
+    The tree with the given Prüfer code, nodes are numbered 1 to N
+
+    Edge i joins the smallest remaining leaf to prufer[i] and the last edge
+    joins the final leaf to N, so only the leaves have to be found.
+    Linear time, https://cp-algorithms.com/graph/pruefer_code.html
+    """
+    edges = EdgeList(N)
+    if N < 2:
+        return edges
+    degree = array("i", [1]) * (N + 1)
+    degree[0] = 0
+    for val, cnt in Counter(prufer).items():
+        degree[val] += cnt
+
+    append = edges.u.append
+    ptr = leaf = degree.index(1)
+    for val in prufer:
+        append(leaf)
+        d = degree[val] - 1
+        degree[val] = d
+        if d == 1 and val < ptr:
+            leaf = val
+        else:
+            ptr += 1
+            while degree[ptr] != 1:
+                ptr += 1
+            leaf = ptr
+    append(leaf)
+    edges.v.extend(prufer)
+    edges.v.append(N)
+    return edges
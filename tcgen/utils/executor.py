@@ -0,0 +1,238 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import typing
+
+from tcgen.utils import launcher
+
+__all__ = [
+    "Executor",
+    "Job",
+    "JobResult",
+]
+
+# Jobs aren't spawned from this process but from a launcher script that
+# forks them and reaps them with os.wait4, which also gives their CPU time and
+# peak memory. Linux carries the peak memory of a process over to what it
+# spawns, the launcher is a few megabytes where this process could be any
+# size. The limits are set in the forked child before it runs the command.
+
+
+class Job:
+    """
+    A command to run, with its stdin and stdout bound to files
+
+    Args:
+        command: Program and its arguments
+        stdin: Path the command reads from, nothing if None
+        stdout: Path the command writes to, thrown away if None
+        timeout: Wall time in seconds before the command is killed
+        cpu_limit: CPU time in seconds before the command is killed
+        memory_limit: Address space in bytes past which allocations fail
+    """
+
+    __slots__ = ("command", "stdin", "stdout", "timeout", "cpu_limit", "memory_limit")
+
+    def __init__(
+        self,
+        command: typing.Sequence[str],
+        stdin: typing.Optional[str] = None,
+        stdout: typing.Optional[str] = None,
+        *,
+        timeout: typing.Optional[float] = None,
+        cpu_limit: typing.Optional[int] = None,
+        memory_limit: typing.Optional[int] = None,
+    ):
+        self.command = list(command)
+        self.stdin = stdin
+        self.stdout = stdout
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+
+
+class JobResult:
+    """
+    How a Job went, peak_rss_kb is the peak resident memory in kilobytes
+
+    peak_rss_kb is the job's own, though never less than the few megabytes
+    the launcher held when it forked the job
+    """
+
+    __slots__ = (
+        "job",
+        "returncode",
+        "wall_time",
+        "cpu_time",
+        "peak_rss_kb",
+        "stderr",
+        "timed_out",
+    )
+
+    def __init__(self, job, returncode, wall_time, cpu_time, peak_rss_kb, stderr, timed_out):
+        self.job = job
+        self.returncode = returncode
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_rss_kb = peak_rss_kb
+        self.stderr = stderr
+        self.timed_out = timed_out
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+class _Launcher:
+    """The launcher process of a run, and the jobs waiting on it"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", launcher.__file__], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        self.pending = {}
+        self.buffer = b""
+        self.loop = asyncio.get_running_loop()
+        self.loop.add_reader(self.process.stdout.fileno(), self._read)
+
+    def _read(self):
+        data = os.read(self.process.stdout.fileno(), 1 << 16)
+        if not data:
+            self.loop.remove_reader(self.process.stdout.fileno())
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("The launcher exited"))
+            return
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        for line in lines:
+            reply = json.loads(line)
+            future = self.pending.pop(reply["id"])
+            if not future.done():
+                future.set_result(reply)
+
+    def _send(self, request: dict) -> None:
+        self.process.stdin.write(json.dumps(request).encode() + b"\n")
+        self.process.stdin.flush()
+
+    def start(self, job_id: int, job: "Job", stderr: str) -> asyncio.Future:
+        """Starts the job, the future is set to the launcher's reply once it's reaped"""
+        self.pending[job_id] = self.loop.create_future()
+        self._send({
+            "id": job_id,
+            "command": job.command,
+            "stdin": job.stdin,
+            "stdout": job.stdout,
+            "stderr": stderr,
+            "cpu_limit": job.cpu_limit,
+            "memory_limit": job.memory_limit,
+        })
+        return self.pending[job_id]
+
+    def kill(self, job_id: int) -> None:
+        self._send({"kill": job_id})
+
+    def close(self) -> None:
+        """Kills whatever is still running and waits for the launcher to exit"""
+        self.loop.remove_reader(self.process.stdout.fileno())
+        self.process.stdin.close()
+        # Replies for the jobs it kills are thrown away, it could block writing them otherwise
+        self.process.stdout.read()
+        self.process.stdout.close()
+        self.process.wait()
+
+
+class Executor:
+    """
+    Runs subprocesses from one parent process, at most concurrency at a time
+
+    Args:
+        concurrency: Number of jobs running at once, None uses every core
+    """
+
+    def __init__(self, concurrency: typing.Optional[int] = None):
+        self.concurrency = concurrency or os.cpu_count() or 1
+
+    def run(
+        self,
+        jobs: typing.Iterable[Job],
+        progress: typing.Optional[typing.Callable[[int, JobResult], None]] = None,
+    ) -> typing.List[JobResult]:
+        """
+        Runs every job, see run_async
+
+        Returns:
+            The result of every job, in the order of jobs
+        """
+        return asyncio.run(self.run_async(jobs, progress))
+
+    async def run_async(
+        self,
+        jobs: typing.Iterable[Job],
+        progress: typing.Optional[typing.Callable[[int, JobResult], None]] = None,
+    ) -> typing.List[JobResult]:
+        """
+        Runs every job, jobs start in order as earlier ones finish
+
+        Args:
+            jobs: Jobs to run
+            progress: Called with (number of jobs done, result) for every job in
+                the order of jobs, results that finish early are held back until
+                the ones before them are done. Every running job is killed if it
+                raises, or if this is cancelled
+
+        Returns:
+            The result of every job, in the order of jobs
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            spawner = _Launcher()
+            tasks = [
+                asyncio.ensure_future(self._run_job(job_id, job, semaphore, spawner, tmp))
+                for job_id, job in enumerate(jobs)
+            ]
+            try:
+                for cnt, task in enumerate(tasks, 1):
+                    results.append(await task)
+                    if progress is not None:
+                        progress(cnt, results[-1])
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                spawner.close()
+        return results
+
+    async def _run_job(self, job_id: int, job: Job, semaphore: asyncio.Semaphore, spawner, tmp) -> JobResult:
+        async with semaphore:
+            stderr = os.path.join(tmp, f"{job_id}.err")
+            reaped = spawner.start(job_id, job, stderr)
+            timed_out = False
+            try:
+                await asyncio.wait_for(asyncio.shield(reaped), job.timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                spawner.kill(job_id)
+            except asyncio.CancelledError:
+                spawner.kill(job_id)
+                raise
+            reply = await reaped
+
+        if "error" in reply:
+            raise OSError(f"Couldn't run {job.command}: {reply['error']}")
+        with open(stderr, "rb") as f:
+            err = f.read().decode(errors="replace")
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        peak_rss_kb = reply["maxrss"] // 1024 if sys.platform == "darwin" else reply["maxrss"]
+        return JobResult(
+            job,
+            os.waitstatus_to_exitcode(reply["status"]),
+            reply["wall_time"],
+            reply["utime"] + reply["stime"],
+            peak_rss_kb,
+            err,
+            timed_out,
+        )
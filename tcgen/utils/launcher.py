@@ -0,0 +1,139 @@
+import json
+import os
+import resource
+import selectors
+import signal
+import sys
+import time
+
+# Forks and reaps the jobs of an Executor, see tcgen.utils.executor
+#
+# It's run as a script of its own so it stays a few megabytes: Linux carries
+# the peak memory of a process over to the children it spawns, and this one is
+# small enough for the peak memory of a job to be its own. Only the standard
+# library may be imported here.
+#
+# Requests are read from stdin, one JSON object per line:
+#   {"id": 1, "command": [...], "stdin": ..., "stdout": ..., "stderr": ...,
+#    "cpu_limit": ..., "memory_limit": ...}  runs a job
+#   {"kill": 1}                               kills it if it's still running
+# One line is written to stdout for every job once it's reaped:
+#   {"id": 1, "status": ..., "wall_time": ..., "utime": ..., "stime": ..., "maxrss": ...}
+# or {"id": 1, "error": ...} if it couldn't be started. Running jobs are killed
+# when stdin is closed.
+
+
+def _exec(request, error_fd):
+    """Runs in the forked child, only returns if the command couldn't be started"""
+    try:
+        # Ignored signals stay ignored through exec, the job should get them
+        for sig in (signal.SIGINT, signal.SIGPIPE, signal.SIGXFSZ):
+            signal.signal(sig, signal.SIG_DFL)
+        if request["cpu_limit"] is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, (request["cpu_limit"], request["cpu_limit"] + 1))
+        if request["memory_limit"] is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (request["memory_limit"], request["memory_limit"]))
+        files = (
+            os.open(request["stdin"] or os.devnull, os.O_RDONLY),
+            os.open(request["stdout"] or os.devnull, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666),
+            os.open(request["stderr"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666),
+        )
+        for fd, file in enumerate(files):
+            os.dup2(file, fd)
+        os.execvp(request["command"][0], request["command"])
+    except BaseException as exc:
+        os.write(error_fd, f"{type(exc).__name__}: {exc}".encode())
+
+
+def _start(request):
+    """Forks the job, returns its pid or why it couldn't be started"""
+    # Closed on exec, so reading it only blocks until the command has started
+    error_r, error_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _exec(request, error_w)
+        finally:
+            os._exit(127)
+    os.close(error_w)
+    with os.fdopen(error_r, "rb") as f:
+        error = f.read()
+    if error:
+        os.waitpid(pid, 0)
+        return None, error.decode(errors="replace")
+    return pid, None
+
+
+def _reply(message):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    running = {}
+    started = {}
+
+    def reap(flags):
+        while running:
+            try:
+                pid, status, usage = os.wait4(-1, flags)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            job_id = running.pop(pid)
+            _reply({
+                "id": job_id,
+                "status": status,
+                "wall_time": time.perf_counter() - started.pop(pid),
+                "utime": usage.ru_utime,
+                "stime": usage.ru_stime,
+                "maxrss": usage.ru_maxrss,
+            })
+
+    # Ctrl-C reaches the whole process group, the executor kills the jobs by
+    # closing stdin instead
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Woken up through a pipe when a job exits, so requests and exits are
+    # waited on together
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+    selector.register(wakeup_r, selectors.EVENT_READ)
+    buffer = b""
+    while True:
+        for key, _ in selector.select():
+            if key.fd == wakeup_r:
+                os.read(wakeup_r, 4096)
+                reap(os.WNOHANG)
+                continue
+            data = os.read(key.fd, 1 << 16)
+            if not data:
+                for pid in running:
+                    os.kill(pid, signal.SIGKILL)
+                reap(0)
+                return
+            *lines, buffer = (buffer + data).split(b"\n")
+            for line in lines:
+                request = json.loads(line)
+                if "kill" in request:
+                    pid = next((pid for pid, job_id in running.items() if job_id == request["kill"]), None)
+                    # Not reaped yet, so the pid can't have been reused
+                    if pid is not None:
+                        os.kill(pid, signal.SIGKILL)
+                    continue
+                start = time.perf_counter()
+                pid, error = _start(request)
+                if pid is None:
+                    _reply({"id": request["id"], "error": error})
+                else:
+                    running[pid] = request["id"]
+                    started[pid] = start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import array
+import bisect
+import collections
+import itertools
+import math
+import typing
+
+# Sieve tables are shared between every Prime and random.randprime call,
+# ranges that are too wide to sieve fall back to sympy. sympy is slow to
+# import, so it's only imported by the fallbacks.
+
+# Most work sieve_cost allows for a table, about a second of it
+SIEVE_LIMIT = 1 << 25
+# Most work for has_prime, which draws nothing so the answer doesn't depend on
+# how it's found. Wider or higher ranges are left to sympy.nextprime, which
+# takes well under a millisecond anywhere
+CHECK_LIMIT = 1 << 20
+SEGMENT_SIZE = 1 << 20
+# Cost of crossing off one base prime in a segment, relative to sieving one number
+_BASE_PRIME_COST = 25
+# Upper bound on the number of primes kept across all cached tables
+CACHE_LIMIT = 1 << 23
+# Upper bound on the number of cached tables, every miss looks at all of them
+TABLE_LIMIT = 64
+# Narrower ranges are sieved as the aligned blocks of this size covering
+# them, so nearby ranges share a table
+BLOCK_SIZE = 1 << 16
+
+# (L, U) -> primes in [L, U], most recently used last
+_tables = collections.OrderedDict()
+# Number of primes across all cached tables
+_cached = 0
+
+
+def _small_primes(n: int) -> typing.List[int]:
+    """Primes up to n with a plain sieve of Eratosthenes"""
+    if n < 2:
+        return []
+    sieve = bytearray([1]) * (n + 1)
+    sieve[0:2] = b"\x00\x00"
+    for p in range(2, math.isqrt(n) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, n + 1, p)))
+    return list(itertools.compress(range(n + 1), sieve))
+
+
+def _sieve(L: int, U: int) -> array.array:
+    """Primes in [L, U] with a segmented sieve"""
+    L = max(L, 2)
+    primes = array.array("q")
+    base = _small_primes(math.isqrt(U))
+    for lo in range(L, U + 1, SEGMENT_SIZE):
+        hi = min(lo + SEGMENT_SIZE - 1, U)
+        segment = bytearray([1]) * (hi - lo + 1)
+        for p in base:
+            if p * p > hi:
+                break
+            start = max(p * p, -(-lo // p) * p)
+            if start <= hi:
+                segment[start - lo::p] = bytes((hi - start) // p + 1)
+        primes.extend(itertools.compress(range(lo, hi + 1), segment))
+    return primes
+
+
+def sieve_cost(L: int, U: int) -> int:
+    """
+    Estimated work to sieve [L, U], in numbers sieved
+
+    Every segment loops over the primes up to sqrt(U) in Python, which is what
+    dominates high ranges
+    """
+    L = max(L, 2)
+    if L > U:
+        return 0
+    root = math.isqrt(U)
+    base = int(root / math.log(root)) if root > 2 else 1
+    segments = (U - L) // SEGMENT_SIZE + 1
+    return U - L + root + segments * base * _BASE_PRIME_COST
+
+
+def can_sieve(L: int, U: int, limit: int = SIEVE_LIMIT) -> bool:
+    return sieve_cost(L, U) <= limit
+
+
+class PrimeRange:
+    """
+    A view over the primes in [L, U]
+
+    Indexing is 0-indexed and O(1), the table backing it is shared
+    """
+
+    def __init__(self, table: array.array, lo: int, hi: int):
+        self._table = table
+        self._lo = lo
+        self._hi = hi
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def __getitem__(self, idx: int) -> int:
+        if idx < 0 or idx >= len(self):
+            raise IndexError("prime index out of range")
+        return self._table[self._lo + idx]
+
+    def values(self, idxs: typing.Iterable[int]) -> typing.List[int]:
+        """Maps a batch of indices to primes"""
+        table, lo = self._table, self._lo
+        return [table[lo + idx] for idx in idxs]
+
+
+def _lookup(key: typing.Tuple[int, int], L: int, U: int) -> typing.Optional[array.array]:
+    """The table cached for key, or any cached table covering [L, U]"""
+    if key in _tables:
+        _tables.move_to_end(key)
+        return _tables[key]
+    for table_key, table in _tables.items():
+        if table_key[0] <= L and U <= table_key[1]:
+            _tables.move_to_end(table_key)
+            return table
+    return None
+
+
+def clear_cache() -> None:
+    """Drops every cached table"""
+    global _cached
+    _tables.clear()
+    _cached = 0
+
+
+def prime_range(L: int, U: int, limit: int = SIEVE_LIMIT) -> typing.Optional[PrimeRange]:
+    """
+    Returns the primes in [L, U], sieving them if no cached table covers the range
+
+    Args:
+        limit: Most work the sieve may take, see sieve_cost
+
+    Returns:
+        A PrimeRange or None if the range costs more than limit to sieve
+    """
+    global _cached
+    if not can_sieve(L, U, limit):
+        return None
+    if max(L, 2) > U:
+        return PrimeRange(array.array("q"), 0, 0)
+    if U - L < BLOCK_SIZE:
+        key = (L - L % BLOCK_SIZE, U - U % BLOCK_SIZE + BLOCK_SIZE - 1)
+    else:
+        key = (L, U)
+    table = _lookup(key, L, U)
+    if table is None:
+        table = _tables[key] = _sieve(*key)
+        _cached += len(table)
+        # Evict the least recently used tables
+        while len(_tables) > 1 and (_cached > CACHE_LIMIT or len(_tables) > TABLE_LIMIT):
+            _cached -= len(_tables.popitem(last=False)[1])
+    return PrimeRange(
+        table, bisect.bisect_left(table, L), bisect.bisect_right(table, U)
+    )
+
+
+def count_primes(L: int, U: int) -> int:
+    """Number of primes in [L, U]"""
+    if L > U:
+        return 0
+    primes = prime_range(L, U)
+    if primes is not None:
+        return len(primes)
+    import sympy
+
+    return int(sympy.primepi(U) - sympy.primepi(max(L - 1, 0)))
+
+
+def has_prime(L: int, U: int) -> bool:
+    """Whether there's a prime in [L, U]"""
+    if L > U:
+        return False
+    primes = prime_range(L, U, CHECK_LIMIT)
+    if primes is not None:
+        return len(primes) > 0
+    import sympy
+
+    return sympy.nextprime(L - 1) <= U
+
+
+def kth_prime(L: int, U: int, k: int) -> int:
+    """
+    Returns the kth smallest prime in [L, U]
+
+    Raises:
+        IndexError: where there are less than k primes in range
+    """
+    if k < 1:
+        raise IndexError("k outside of bounds")
+    primes = prime_range(L, U)
+    if primes is not None:
+        if k > len(primes):
+            raise IndexError("k outside of bounds")
+        return primes[k - 1]
+    import sympy
+
+    prime = next(itertools.islice(sympy.primerange(L, U + 1), k - 1, None), None)
+    if prime is None:
+        raise IndexError("k outside of bounds")
+    return prime
+
+
+def kth_primes(L: int, U: int, ks: typing.Sequence[int]) -> typing.List[int]:
+    """
+    Returns the kth smallest prime in [L, U] for every k in ks, ks must be sorted
+
+    Raises:
+        IndexError: where a k is less than 1 or there are less than k primes in range
+    """
+    if not len(ks):
+        return []
+    if ks[0] < 1:
+        raise IndexError("k outside of bounds")
+    primes = prime_range(L, U)
+    if primes is not None:
+        if ks[-1] > len(primes):
+            raise IndexError("k outside of bounds")
+        return primes.values(k - 1 for k in ks)
+
+    # One pass over the range, stopping at the largest k
+    import sympy
+
+    ret = []
+    it = iter(ks)
+    k = next(it, None)
+    for idx, prime in enumerate(sympy.primerange(L, U + 1), 1):
+        while k == idx:
+            ret.append(prime)
+            k = next(it, None)
+        if k is None:
+            return ret
+    raise IndexError("k outside of bounds")
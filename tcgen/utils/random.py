@@ -1,12 +1,35 @@
+from tcgen.utils import primes
 import random as random_pkg
-import sympy
+import bisect
+import functools
+import hashlib
 import logging
+import math
 import typing
 
 # This is meant to be a wrapper to allow
 # weighted randoms
 # noise
 
+# Batches smaller than this aren't worth setting up a numpy generator for
+NUMPY_THRESHOLD = 1024
+# _rng().choices picks with floor(random() * n), keep n well within 53 bits
+CHOICES_LIMIT = 1 << 32
+# Strings are filled in chunks of this many characters
+STRING_CHUNK = 1 << 16
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+# Maps the digits of a binary string to the bytes 0 and 1
+_BITS = bytes.maketrans(b"01", b"\x00\x01")
+# Bulk draws made in a context are split into blocks of this many values,
+# each block has its own stream so it can be drawn without the ones before it
+BLOCK_SIZE = 1 << 16
+
+# Active RandomContexts, innermost last
+_contexts = []
+# Whether large batches are drawn with numpy, see random.use_numpy
+_use_numpy = False
+
 
 class InvalidRangeException(Exception):
     """The bounds for the range is impossible"""
@@ -14,10 +37,314 @@ class InvalidRangeException(Exception):
     pass
 
 
+def _numpy(N: int):
+    """numpy if the batch of N values should be drawn with it, otherwise None"""
+    if not _use_numpy or N < NUMPY_THRESHOLD:
+        return None
+    import numpy
+
+    return numpy
+
+
+def _rng():
+    """The generator draws come from, random_pkg itself outside of a context"""
+    return _contexts[-1].rng if _contexts else random_pkg
+
+
+def _randints(L: int, U: int, N: int) -> typing.List[int]:
+    """N random integers in [L, U], bounds are assumed to be valid"""
+    span = U - L + 1
+    numpy = _numpy(N)
+    if numpy is not None and INT64_MIN <= L and U <= INT64_MAX:
+        # Seeded from the current stream so seeding still makes batches reproducible
+        rng = numpy.random.default_rng(_rng().getrandbits(64))
+        return rng.integers(L, U, size=N, endpoint=True).tolist()
+    if span <= CHOICES_LIMIT:
+        return _rng().choices(range(L, U + 1), k=N)
+    randrange = _rng().randrange
+    return [L + randrange(span) for _ in range(N)]
+
+
+def _floyd_sample(T: int, N: int) -> typing.Set[int]:
+    """N distinct integers in [0, T) with Floyd's algorithm, O(N) time and memory"""
+    chosen = set()
+    randrange = _rng().randrange
+    for j in range(T - N, T):
+        t = randrange(j + 1)
+        chosen.add(j if t in chosen else t)
+    return chosen
+
+
+def _iroot(u: int, k: int) -> int:
+    """Largest x with x ** k <= u"""
+    if u < 2 or k == 1:
+        return u
+    x = max(1, int(math.exp(math.log(u) / k)))
+    if x**k <= u < (x + 1) ** k:
+        return x
+    # One newton step from any x > 0 lands at or above the root, then it decreases
+    x = ((k - 1) * x + u // x ** (k - 1)) // k
+    while True:
+        y = ((k - 1) * x + u // x ** (k - 1)) // k
+        if y >= x:
+            return x
+        x = y
+
+
+def _weighted_index(n: int, wcnt: int) -> int:
+    """
+    An index in [0, n) distributed as the max of abs(wcnt) + 1 uniform indices,
+    or the min if wcnt < 0
+
+    P(max <= x) = ((x + 1) / n) ** k, so a single uniform u in [0, n ** k)
+    goes through the inverse, floor(u ** (1 / k)), exactly
+    """
+    k = abs(wcnt) + 1
+    x = _iroot(_rng().randrange(n**k), k)
+    return x if wcnt >= 0 else n - 1 - x
+
+
+def _weighted_indices(n: int, wcnt: int, N: int) -> typing.List[int]:
+    if wcnt == 0:
+        return _randints(0, n - 1, N)
+    k = abs(wcnt) + 1
+    if n**k > CHOICES_LIMIT:
+        return [_weighted_index(n, wcnt) for _ in range(N)]
+    # Small enough to draw every u in bulk, the root of u is the number of
+    # thresholds (x + 1) ** k at or below it
+    thresholds = [(x + 1) ** k for x in range(n - 1)]
+    idxs = map(functools.partial(bisect.bisect_right, thresholds), _randints(0, n**k - 1, N))
+    if wcnt > 0:
+        return list(idxs)
+    return [n - 1 - idx for idx in idxs]
+
+
+def _randstring(
+    alphabet: typing.Sequence[str], N: int, wcnt: int, as_bytes: bool
+) -> typing.Union[str, bytes]:
+    """
+    A string of N characters where alphabet[idx] is picked for each index,
+    the index is weighted if wcnt != 0
+    """
+    if not all(ch.isascii() for ch in alphabet):
+        chars = [alphabet[idx] for idx in _weighted_indices(len(alphabet), wcnt, N)]
+        ret = "".join(chars)
+        return ret.encode() if as_bytes else ret
+
+    # Every character is a single byte, so the result is filled in place
+    buf = _table_bytes("".join(alphabet).encode("ascii"), N, wcnt)
+    return bytes(buf) if as_bytes else buf.decode("ascii")
+
+
+def _table_bytes(table: bytes, N: int, wcnt: int = 0) -> bytearray:
+    """N bytes where table[idx] is picked for each index, the index is weighted if wcnt != 0"""
+    n = len(table)
+    if wcnt == 0 and n <= 256:
+        # Random bytes at or above limit are dropped so every entry is equally likely
+        limit = 256 - 256 % n
+        trans = bytes(table[b % n] for b in range(limit)).ljust(256, b"\x00")
+        drop = bytes(range(limit, 256))
+    buf = bytearray(N)
+    for lo in range(0, N, STRING_CHUNK):
+        size = min(STRING_CHUNK, N - lo)
+        if wcnt == 0 and n <= 256:
+            chunk = b""
+            while len(chunk) < size:
+                draw = (size - len(chunk)) * 256 // limit + 64
+                chunk += _rng().randbytes(draw).translate(trans, drop)
+            chunk = chunk[:size]
+        else:
+            chunk = bytes(map(table.__getitem__, _weighted_indices(n, wcnt, size)))
+        buf[lo:lo + size] = chunk
+    return buf
+
+
+def _by_weighted_index(char_set: str, priority: typing.List[int]) -> typing.List[str]:
+    """The character wchoice picks for each weighted index"""
+    return [char_set[p - 1] for p in reversed(priority)]
+
+
+def _bounds(L: int, U: int, inclusive: bool) -> typing.Tuple[int, int]:
+    if not inclusive:
+        L += 1
+        U -= 1
+    if L > U:
+        raise InvalidRangeException
+    if L == U:
+        logging.warning(
+            f"The bounds {L} and {U} are the same, only one "
+            "value can be generated"
+        )
+    return L, U
+
+
+def _float_bounds(
+    L: float, U: float, places: int, inclusive: bool
+) -> typing.Tuple[int, int]:
+    """The bounds as integers scaled by 10 ** places"""
+    L_i = int(L * 10**places)
+    U_i = int(U * 10**places)
+    if not inclusive:
+        L_i += 1
+        U_i -= 1
+    if L_i > U_i:
+        raise InvalidRangeException
+    if L_i == U_i:
+        logging.warning(f"The bounds {L} and {U} can only generated one value")
+    return L_i, U_i
+
+
+def _prime_table(L: int, U: int) -> typing.Optional[primes.PrimeRange]:
+    """
+    Sieved primes in [L, U] or None if the range is too costly to sieve
+
+    Single and bulk draws sieve the same ranges, and draw uniformly either way
+    """
+    table = primes.prime_range(L, U)
+    if table is not None and len(table) == 0:
+        raise ValueError(f"There are no primes between {L} and {U}")
+    return table
+
+
+def _randprimes_sparse(L: int, U: int, N: int) -> typing.List[int]:
+    """
+    N primes drawn uniformly from [L, U] without a table, like a table draw
+
+    Values are drawn from the current stream until one is prime, which takes
+    about ln(U) draws. Prime gaps are small, so even a narrow range with few
+    primes takes at most a few thousand
+    """
+    import sympy
+
+    if sympy.nextprime(L - 1) > U:
+        raise ValueError(f"There are no primes between {L} and {U}")
+    randint, isprime = _rng().randint, sympy.isprime
+    ret = []
+    while len(ret) < N:
+        value = randint(L, U)
+        if isprime(value):
+            ret.append(value)
+    return ret
+
+
+class RandomContext:
+    """
+    An independent random stream identified by (seed, *keys)
+
+    Every draw made inside a `with` block comes from this stream instead of
+    the global one, so it doesn't matter what was drawn before it or what
+    other contexts draw. A stream can be recreated at any point from its
+    seed and keys without replaying anything.
+
+    Examples:
+        with RandomContext(seed, case_num):
+            print(Array(N))
+
+        # Values [lo, hi) of the kth bulk draw (counting from 0) in the case
+        # above, only the blocks of BLOCK_SIZE values they're in are drawn
+        with RandomContext(seed, case_num) as ctx:
+            ctx.jump(k)
+            print(Array(N).slice(lo, hi))
+    """
+
+    def __init__(self, seed: typing.Union[int, str], *keys: typing.Union[int, str]):
+        self.seed = seed
+        self.keys = keys
+        self._rng = None
+        self._streams = 0
+
+    @property
+    def rng(self) -> random_pkg.Random:
+        # Created on first use, streams that only hand out substreams never need one
+        if self._rng is None:
+            self._rng = random_pkg.Random(random.derive_seed(self.seed, *self.keys))
+        return self._rng
+
+    def substream(self, *keys: typing.Union[int, str]) -> "RandomContext":
+        """A stream derived from this one, independent of it and its draws"""
+        return RandomContext(self.seed, *self.keys, *keys)
+
+    def next_stream(self) -> "RandomContext":
+        """Substreams 0, 1, 2, ... in call order, bulk draws get one each"""
+        stream = self.substream(self._streams)
+        self._streams += 1
+        return stream
+
+    def reseed(self, seed: typing.Union[int, str]) -> "RandomContext":
+        """
+        Restarts the stream as RandomContext(seed), its draws and its substreams
+
+        random.seed calls this on the current context
+        """
+        self.seed = seed
+        self.keys = ()
+        self._rng = None
+        self._streams = 0
+        return self
+
+    def jump(self, stream: int) -> "RandomContext":
+        """Makes the next bulk draw use substream `stream`, skipping the ones before it"""
+        self._streams = stream
+        return self
+
+    def __enter__(self) -> "RandomContext":
+        _contexts.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _contexts.pop()
+
+    def __repr__(self):
+        return f"RandomContext{(self.seed,) + self.keys}"
+
+
 class random:
+    @staticmethod
+    def use_numpy(enabled: bool = True) -> None:
+        """
+        Draws batches of NUMPY_THRESHOLD or more integers, and permutations, with numpy
+
+        It's faster, but the values are different from the pure python ones,
+        so a seed only gives the same cases with the same setting. Off by default
+
+        Raises:
+            ImportError: where numpy isn't installed
+        """
+        global _use_numpy
+        if enabled:
+            import numpy  # noqa: F401
+        _use_numpy = enabled
+
     @staticmethod
     def seed(seed: int) -> None:
-        random_pkg.seed(seed)
+        """
+        Seeds the current stream, the global one outside of a context
+
+        In a context the bulk draws, which each take a substream, are reseeded too
+        """
+        if _contexts:
+            _contexts[-1].reseed(seed)
+        else:
+            random_pkg.seed(seed)
+
+    @staticmethod
+    def derive_seed(seed: typing.Union[int, str], *keys: typing.Union[int, str]) -> int:
+        """
+        Returns a 64 bit seed derived from seed and keys
+
+        The same arguments always give the same seed, in any process
+
+        Args:
+            seed: Master seed
+            keys: What the seed is for, e.g. the case number
+        """
+        data = repr((seed,) + keys).encode()
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+    @staticmethod
+    def next_stream() -> typing.Optional[RandomContext]:
+        """The next substream of the current context, None outside of a context"""
+        return _contexts[-1].next_stream() if _contexts else None
 
     @staticmethod
     def randint(L: int, U: int, inclusive: bool = True) -> int:
@@ -45,7 +372,61 @@ class random:
                 f"The bounds {L} and {U} are the same, only one "
                 "value can be generated"
             )
-        return random_pkg.randint(L, U)
+        return _rng().randint(L, U)
+
+    @staticmethod
+    def randints(L: int, U: int, N: int, inclusive: bool = True) -> typing.List[int]:
+        """
+        Returns a list of random integers
+
+        Args:
+            L: Lower bound
+            U: Upper bound
+            N: Number of integers to generate
+            inclusive: whether the bounds are inclusive
+
+        Returns:
+            A list of N random integers
+
+        Raises:
+            InvalidRangeException: where L > U
+        """
+        L, U = _bounds(L, U, inclusive)
+        return _randints(L, U, N)
+
+    @staticmethod
+    def sample(L: int, U: int, N: int, inclusive: bool = True) -> typing.List[int]:
+        """
+        Returns N distinct random integers in increasing order
+
+        Memory and time are proportional to N, not to U - L
+
+        Args:
+            L: Lower bound
+            U: Upper bound
+            N: Number of integers to pick
+            inclusive: whether the bounds are inclusive
+
+        Returns:
+            A sorted list of N distinct random integers
+
+        Raises:
+            InvalidRangeException: where L > U
+            ValueError: where there are less than N integers in range
+        """
+        if not inclusive:
+            L += 1
+            U -= 1
+        if L > U:
+            raise InvalidRangeException
+        T = U - L + 1
+        if N > T:
+            raise ValueError("Asked for more values than can generate")
+        if 2 * N > T:
+            # Close to the whole range, it's cheaper to pick what's left out
+            excluded = _floyd_sample(T, T - N)
+            return [L + r for r in range(T) if r not in excluded]
+        return [L + r for r in sorted(_floyd_sample(T, N))]
 
     @staticmethod
     def wrandint(L: int, U: int, wcnt: int = 5, inclusive: bool = True) -> int:
@@ -68,13 +449,31 @@ class random:
         """
         # The way cf testlib does it is a bit different.
         # https://github.com/MikeMirzayanov/testlib/blob/master/testlib.h#L787
-        ret = random.randint(L, U, inclusive)
-        for _ in range(abs(wcnt)):
-            if wcnt > 0:
-                ret = max(ret, random.randint(L, U, inclusive))
-            if wcnt < 0:
-                ret = min(ret, random.randint(L, U, inclusive))
-        return ret
+        L, U = _bounds(L, U, inclusive)
+        return L + _weighted_index(U - L + 1, wcnt)
+
+    @staticmethod
+    def wrandints(
+        L: int, U: int, N: int, wcnt: int = 5, inclusive: bool = True
+    ) -> typing.List[int]:
+        """
+        Returns a list of weighted random integers
+
+        Args:
+            L: Lower bound
+            R: Upper bound
+            N: Number of integers to generate
+            wcnt: weighted count, see wrandint
+            inclusive: whether the bounds are inclusive
+
+        Returns:
+            A list of N weighted randoms
+
+        Raises:
+            InvalidRangeException: where L > U
+        """
+        L, U = _bounds(L, U, inclusive)
+        return [L + idx for idx in _weighted_indices(U - L + 1, wcnt, N)]
 
     @staticmethod
     def noise(
@@ -114,16 +513,32 @@ class random:
         Raises:
             InvalidRangeException: where L > U
         """
-        L_i = int(L * 10**places)
-        U_i = int(U * 10**places)
-        if not inclusive:
-            L_i += 1
-            U_i -= 1
-        if L_i > U_i:
-            raise InvalidRangeException
-        if L_i == U_i:
-            logging.warning(f"The bounds {L} and {U} can only generated one value")
-        return random_pkg.randint(L_i, U_i) / 10**places
+        L_i, U_i = _float_bounds(L, U, places, inclusive)
+        return _rng().randint(L_i, U_i) / 10**places
+
+    @staticmethod
+    def randfloats(
+        L: float, U: float, places: int, N: int, inclusive: bool = True
+    ) -> typing.List[float]:
+        """
+        Returns a list of random floats
+
+        Args:
+            L: Lower bound
+            U: Upper bound
+            places: rounded decimal places
+            N: Number of floats to generate
+            inclusive: whether the bounds are inclusive
+
+        Returns:
+            A list of N random floats
+
+        Raises:
+            InvalidRangeException: where L > U
+        """
+        L_i, U_i = _float_bounds(L, U, places, inclusive)
+        scale = 10**places
+        return [val / scale for val in _randints(L_i, U_i, N)]
 
     @staticmethod
     def wrandfloat(
@@ -147,13 +562,33 @@ class random:
         Raises:
             InvalidRangeException: where L > U
         """
-        ret = random.randfloat(L, U, places, inclusive)
-        for _ in range(abs(wcnt)):
-            if wcnt > 0:
-                ret = max(ret, random.randfloat(L, U, places, inclusive))
-            if wcnt < 0:
-                ret = min(ret, random.randfloat(L, U, places, inclusive))
-        return ret
+        L_i, U_i = _float_bounds(L, U, places, inclusive)
+        return (L_i + _weighted_index(U_i - L_i + 1, wcnt)) / 10**places
+
+    @staticmethod
+    def wrandfloats(
+        L: float, U: float, places: int, N: int, wcnt: int = 5, inclusive: bool = True
+    ) -> typing.List[float]:
+        """
+        Returns a list of weighted random floats
+
+        Args:
+            L: Lower bound
+            R: Upper bound
+            places: rounded decimal places
+            N: Number of floats to generate
+            wcnt: weighted count, see wrandfloat
+            inclusive: whether the bounds are inclusive
+
+        Returns:
+            A list of N weighted randoms
+
+        Raises:
+            InvalidRangeException: where L > U
+        """
+        L_i, U_i = _float_bounds(L, U, places, inclusive)
+        scale = 10**places
+        return [(L_i + idx) / scale for idx in _weighted_indices(U_i - L_i + 1, wcnt, N)]
 
     @staticmethod
     def choice(char_set: str) -> str:
@@ -174,6 +609,25 @@ class random:
         idx = random.randint(1, len(char_set))
         return char_set[idx - 1]
 
+    @staticmethod
+    def choices(char_set: str, N: int) -> typing.List[str]:
+        """
+        Returns a list of random characters in string
+
+        Args:
+            char_set: Character set to choose string from
+            N: Number of characters to generate
+
+        Returns:
+            A list of N random characters
+
+        Raises:
+            TypeError: where char_set is empty
+        """
+        if len(char_set) == 0:
+            raise TypeError
+        return _rng().choices(char_set, k=N)
+
     @staticmethod
     def wchoice(char_set: str, priority: typing.List[int], wcnt: int = 5):
         """
@@ -197,14 +651,87 @@ class random:
         if len(char_set) != len(priority):
             raise TypeError
 
-        ret = random.randint(1, len(char_set))
-        for _ in range(abs(wcnt)):
-            if wcnt > 0:
-                ret = max(ret, random.randint(1, len(char_set)))
-            if wcnt < 0:
-                ret = min(ret, random.randint(1, len(char_set)))
+        ret = 1 + _weighted_index(len(char_set), wcnt)
         return char_set[priority[len(char_set) - ret] - 1]
 
+    @staticmethod
+    def wchoices(
+        char_set: str, priority: typing.List[int], N: int, wcnt: int = 5
+    ) -> typing.List[str]:
+        """
+        Returns a list of weighted random characters in string
+
+        Args:
+            char_set: Character set to choose string from
+            priority: Priority of each character in char_set
+            N: Number of characters to generate
+            wcnt: weighted count, see wchoice
+
+        Returns:
+            A list of N weighted random characters
+
+        Raises:
+            TypeError: where char_set is empty
+        """
+        if len(char_set) == 0:
+            raise TypeError
+        if len(char_set) != len(priority):
+            raise TypeError
+        by_index = _by_weighted_index(char_set, priority)
+        return [by_index[idx] for idx in _weighted_indices(len(char_set), wcnt, N)]
+
+    @staticmethod
+    def randstring(
+        char_set: str, N: int, as_bytes: bool = False
+    ) -> typing.Union[str, bytes]:
+        """
+        Returns a random string
+
+        Args:
+            char_set: Character set to choose string from
+            N: Length of the string
+            as_bytes: return the string encoded as bytes
+
+        Returns:
+            A random string of length N
+
+        Raises:
+            TypeError: where char_set is empty
+        """
+        if len(char_set) == 0:
+            raise TypeError
+        return _randstring(char_set, N, 0, as_bytes)
+
+    @staticmethod
+    def wrandstring(
+        char_set: str,
+        priority: typing.List[int],
+        N: int,
+        wcnt: int = 5,
+        as_bytes: bool = False,
+    ) -> typing.Union[str, bytes]:
+        """
+        Returns a weighted random string
+
+        Args:
+            char_set: Character set to choose string from
+            priority: Priority of each character in char_set
+            N: Length of the string
+            wcnt: weighted count, see wchoice
+            as_bytes: return the string encoded as bytes
+
+        Returns:
+            A weighted random string of length N
+
+        Raises:
+            TypeError: where char_set is empty
+        """
+        if len(char_set) == 0:
+            raise TypeError
+        if len(char_set) != len(priority):
+            raise TypeError
+        return _randstring(_by_weighted_index(char_set, priority), N, wcnt, as_bytes)
+
     @staticmethod
     def randprime(L: int, U: int, inclusive: bool = True) -> int:
         """
@@ -222,18 +749,35 @@ class random:
             InvalidRangeException: where L > U
             ValueError: prime does not exist in range
         """
-        if not inclusive:
-            L += 1
-            U -= 1
-        if L > U:
-            raise InvalidRangeException
-        if L == U:
-            logging.warning(
-                f"The bounds {L} and {U} are the same, only one "
-                "value can be generated"
-            )
-        # randprime is [a, b)
-        return sympy.randprime(L, U + 1)
+        L, U = _bounds(L, U, inclusive)
+        table = _prime_table(L, U)
+        if table is None:
+            return _randprimes_sparse(L, U, 1)[0]
+        return table[_rng().randrange(len(table))]
+
+    @staticmethod
+    def randprimes(L: int, U: int, N: int, inclusive: bool = True) -> typing.List[int]:
+        """
+        Returns a list of random primes
+
+        Args:
+            L: Lower bound
+            U: Upper bound
+            N: Number of primes to generate
+            inclusive: whether the bounds are inclusive
+
+        Returns:
+            A list of N random primes
+
+        Raises:
+            InvalidRangeException: where L > U
+            ValueError: prime does not exist in range
+        """
+        L, U = _bounds(L, U, inclusive)
+        table = _prime_table(L, U)
+        if table is None:
+            return _randprimes_sparse(L, U, N)
+        return table.values(_randints(0, len(table) - 1, N))
 
     @staticmethod
     def wrandprime(L: int, U: int, wcnt: int = 5, inclusive: bool = True) -> int:
@@ -255,15 +799,58 @@ class random:
             InvalidRangeException: where L > U
             ValueError: prime does not exist in range
         """
-        # The way cf testlib does it is a bit different.
-        # https://github.com/MikeMirzayanov/testlib/blob/master/testlib.h#L787
-        ret = random.randprime(L, U, inclusive)
-        for _ in range(abs(wcnt)):
-            if wcnt > 0:
-                ret = max(ret, random.randprime(L, U, inclusive))
-            if wcnt < 0:
-                ret = min(ret, random.randprime(L, U, inclusive))
-        return ret
+        L, U = _bounds(L, U, inclusive)
+        table = _prime_table(L, U)
+        if table is not None:
+            # The max of uniform primes is the prime at the max of uniform indices
+            return table[_weighted_index(len(table), wcnt)]
+
+        values = _randprimes_sparse(L, U, abs(wcnt) + 1)
+        return max(values) if wcnt >= 0 else min(values)
+
+    @staticmethod
+    def wrandprimes(
+        L: int, U: int, N: int, wcnt: int = 5, inclusive: bool = True
+    ) -> typing.List[int]:
+        """
+        Returns a list of weighted random primes
+
+        Args:
+            L: Lower bound
+            R: Upper bound
+            N: Number of primes to generate
+            wcnt: weighted count, see wrandprime
+            inclusive: whether the bounds are inclusive
+
+        Returns:
+            A list of N weighted random primes
+
+        Raises:
+            InvalidRangeException: where L > U
+            ValueError: prime does not exist in range
+        """
+        L, U = _bounds(L, U, inclusive)
+        table = _prime_table(L, U)
+        if table is None:
+            return [random.wrandprime(L, U, wcnt) for _ in range(N)]
+        return table.values(_weighted_indices(len(table), wcnt, N))
+
+    @staticmethod
+    def pick(arr: typing.Sequence, N: int) -> list:
+        """
+        Picks N distinct elements in random order
+
+        Args:
+            arr: Sequence to pick from
+            N: Number of elements to pick
+
+        Returns:
+            A list of N elements of arr
+
+        Raises:
+            ValueError: where N > len(arr)
+        """
+        return _rng().sample(arr, N)
 
     @staticmethod
     def shuffle(arr: list) -> list:
@@ -277,5 +864,52 @@ class random:
             Shuffled list
         """
 
-        random_pkg.shuffle(arr)
+        _rng().shuffle(arr)
         return arr
+
+    @staticmethod
+    def randbits(N: int) -> bytearray:
+        """
+        Returns N random bits as a bytearray of 0s and 1s
+
+        Drawn with a single getrandbits call
+
+        Args:
+            N: Number of bits
+        """
+        if N <= 0:
+            return bytearray()
+        return bytearray(format(_rng().getrandbits(N), f"0{N}b").encode().translate(_BITS))
+
+    @staticmethod
+    def bytechoices(table: bytes, N: int) -> bytearray:
+        """
+        Returns N bytes as a bytearray, each picked at random from table
+
+        Args:
+            table: Bytes to pick from, at most 256
+            N: Number of bytes
+
+        Raises:
+            TypeError: where table is empty
+        """
+        if len(table) == 0:
+            raise TypeError
+        return _table_bytes(table, N)
+
+    @staticmethod
+    def permutation(N: int) -> typing.List[int]:
+        """
+        Returns a random permutation of range(N)
+
+        Large permutations are drawn with numpy after random.use_numpy(),
+        the pure python shuffle does a swap per element
+
+        Args:
+            N: Length of the permutation
+        """
+        numpy = _numpy(N)
+        if numpy is not None:
+            rng = numpy.random.default_rng(_rng().getrandbits(64))
+            return rng.permutation(N).tolist()
+        return random.shuffle(list(range(N)))
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import subprocess
+import sys
+import typing
+
+__all__ = [
+    "solution_command",
+]
+
+COMPILE_COMMAND = ["g++"]
+
+
+def source_hash(filename: str) -> str:
+    """Hash of the source and the command it's compiled with"""
+    digest = hashlib.sha256(" ".join(COMPILE_COMMAND).encode())
+    with open(filename, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compile_cpp(filename: str) -> str:
+    """
+    Compiles the solution next to its source, unless the binary there was
+    already compiled from the same source
+
+    The hash of the source is kept in <binary>.hash
+
+    Returns:
+        Path of the binary
+    """
+    exec_name = filename.removesuffix(".cpp")
+    hash_file = exec_name + ".hash"
+    digest = source_hash(filename)
+    if os.path.isfile(exec_name) and os.path.isfile(hash_file):
+        with open(hash_file) as f:
+            if f.read().strip() == digest:
+                return exec_name
+    process = subprocess.run(
+        COMPILE_COMMAND + [filename, "-o", exec_name], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Compilation ran into an error\n\n{process.stderr.decode()}")
+    with open(hash_file, "w") as f:
+        f.write(digest)
+    return exec_name
+
+
+def solution_command(filename: str) -> typing.List[str]:
+    """
+    The command that runs a solution, C++ solutions are compiled first
+
+    Raises:
+        ValueError: where the file isn't a .cpp or .py file
+    """
+    filename = os.path.abspath(filename)
+    if filename.endswith(".cpp"):
+        return [compile_cpp(filename)]
+    if filename.endswith(".py"):
+        return [sys.executable, filename]
+    raise ValueError(f"Unknown file format: {filename}")
@@ -0,0 +1,52 @@
+import typing
+
+__all__ = [
+    "write_joined",
+    "write_lines",
+    "write_value",
+]
+
+# Values are converted to text this many at a time
+WRITE_CHUNK = 1 << 14
+
+
+def write_joined(fp: typing.BinaryIO, values: typing.Sequence, sep: str = " ") -> None:
+    """
+    Writes values separated by sep without building the whole string
+
+    Args:
+        fp: Binary file object to write to
+        values: Values to write, converted with str
+        sep: Separator between values
+    """
+    sep_b = sep.encode()
+    for lo in range(0, len(values), WRITE_CHUNK):
+        if lo:
+            fp.write(sep_b)
+        fp.write(sep.join(map(str, values[lo:lo + WRITE_CHUNK])).encode())
+
+
+def write_lines(fp: typing.BinaryIO, lines: typing.Iterable[str]) -> None:
+    """Writes lines separated by newlines, WRITE_CHUNK lines at a time"""
+    chunk = []
+    first = True
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == WRITE_CHUNK:
+            if not first:
+                fp.write(b"\n")
+            fp.write("\n".join(chunk).encode())
+            chunk = []
+            first = False
+    if chunk:
+        if not first:
+            fp.write(b"\n")
+        fp.write("\n".join(chunk).encode())
+
+
+def write_value(fp: typing.BinaryIO, value) -> None:
+    """Writes anything that can be printed, datatypes stream themselves"""
+    if hasattr(value, "write") and callable(value.write):
+        value.write(fp)
+    else:
+        fp.write(str(value).encode())
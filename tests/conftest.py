@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Writes a program to tmp_path/name and returns its path"""
+
+    def write(name, code):
+        path = tmp_path / name
+        path.write_text(code + "\n")
+        return str(path)
+
+    return write
@@ -4,6 +4,9 @@ from tcgen.datatypes import DataType
 from tcgen.primitives import *
 from tcgen.utils import random
 from tcgen.utils.constants import *
+from tcgen import datatypes
+from tcgen.utils import writer
+import io
 import pytest
 import sys
 
@@ -113,6 +116,36 @@ class TestArray(TestDataTypesMixin):
         with pytest.raises(TypeError):
             Array(10, type=DataType())
 
+    def test_slice(self, monkeypatch):
+        from tcgen import primitives
+        from tcgen.utils import RandomContext
+
+        monkeypatch.setattr(primitives, "BLOCK_SIZE", 7)
+        for type in [Integer(), Integer(1, 10**18, wcnt=3), Float(), Char()]:
+            with RandomContext(0, 1):
+                Integer().val()
+                Array(5, type).val()
+                arr = Array(100, type).val()
+            for lo, hi in [(0, 100), (0, 1), (13, 14), (20, 63), (99, 100), (50, 50)]:
+                with RandomContext(0, 1) as ctx:
+                    # The second bulk draw, single values don't take a stream
+                    ctx.jump(1)
+                    assert Array(100, type).slice(lo, hi) == arr[lo:hi]
+                    assert Array(100, type).slice(lo, hi) != arr[lo:hi] or lo == hi
+
+        arr = Array(20)
+        assert len(arr.slice(-5, 100)) == 5
+        values = arr.val()
+        assert arr.slice(-5, 100) == values[15:]
+        values = NonDecreasing(20).slice(3, 8)
+        assert len(values) == 5 and values == sorted(values)
+
+        # The size is only resolved for the slice, like generating leaves it
+        N = Integer(10, 20)
+        arr = Array(N)
+        assert len(arr.slice(0, 5)) == 5
+        assert arr.N is N
+
 
 class TestString(TestDataTypesMixin):
     def test_string(self):
@@ -123,6 +156,11 @@ class TestString(TestDataTypesMixin):
         for c in String(N, char_set=UPPERCASE):
             assert c in UPPERCASE
 
+        string = String(N, as_bytes=True)
+        assert isinstance(string.val(), bytes) and len(string.val()) == N
+        assert str(string) == string.val().decode()
+        assert len(String(N, type=Char(wcnt=5)).val()) == N
+
 
 class TestNonDecreasing(TestDataTypesMixin):
     def test_nondecreasing(self):
@@ -171,6 +209,14 @@ class TestStrictlyIncreasing(TestDataTypesMixin):
         for i in range(N - 1):
             assert arr[i] < arr[i + 1]
 
+        arr = StrictlyIncreasing(N, Integer(1, 10**18)).val()
+        assert len(arr) == N
+        for i in range(N - 1):
+            assert 1 <= arr[i] < arr[i + 1] <= 10**18
+
+        arr = StrictlyIncreasing(N, Integer(1, N + 1)).val()
+        assert len(set(arr)) == N
+
         with pytest.raises(ValueError):
             StrictlyIncreasing(1000, Integer(100, 110))
         with pytest.raises(TypeError):
@@ -241,6 +287,17 @@ class TestGraphMixin:
         dfs(1, -1)
         return is_tree
 
+    def degrees(self, N, edges):
+        degree = [0] * (N + 1)
+        for edge in edges:
+            degree[edge[0]] += 1
+            degree[edge[1]] += 1
+        return sorted(degree)
+
+    def undirected(self, edges):
+        """Sorted edges with each edge's endpoints sorted"""
+        return sorted((min(edge[:2]), max(edge[:2])) + tuple(edge[2:]) for edge in edges)
+
     def assert_str(self, str, N, M, W: Primitive = None, type=None):
         edges = str.split("\n")
         assert len(edges) == M
@@ -291,6 +348,30 @@ class TestGraph(TestDataTypesMixin, TestGraphMixin):
         graph = Graph(N, M)
         self.assert_str(str(graph), N, M)
 
+    def test_dense_graph(self):
+        N = 30
+        M = N * (N - 1) // 2
+        for m in [M // 2, M // 2 + 1, M - 1, M]:
+            edges = Graph(N, m).val()
+            assert len(edges) == m
+            assert len({(min(edge), max(edge)) for edge in edges}) == m
+            assert self.is_connected(N, edges)
+            assert not self.has_self_edge(N, edges)
+
+        edges = Graph(N, M, directed=True).val()
+        assert len(set(edges)) == M and not self.has_self_edge(N, edges)
+        edges = Graph(N, M, self_edge=True, connected=False).val()
+        assert len({(min(edge), max(edge)) for edge in edges}) == M
+        edges = Graph(N, M, Integer(1, 10)).val()
+        assert all(1 <= w <= 10 for _, _, w in edges)
+
+        edges = DAG(N, M).val()
+        assert len(set(edges)) == M
+        assert all(u < v for u, v in edges)
+
+        edges = Graph(5, 40, directed=True, duplicate=True).val()
+        assert len(edges) == 40 and not self.has_self_edge(5, edges)
+
     def test_adjmatrix(self):
         N = 10
         M = 20
@@ -325,6 +406,33 @@ class TestGraph(TestDataTypesMixin, TestGraphMixin):
         print(g.val())
         assert tot == M * 2
 
+        graph = DAG(N, M).adj_matrix().val()
+        assert sum(map(sum, graph)) == M
+        assert all(not graph[u][v] for u in range(N) for v in range(u + 1))
+
+    def test_csr(self):
+        N = 200
+        tree = Tree(N, Integer(1, 9)).shuffle_nodes()
+        csr = tree.csr()
+        assert sum(csr.degrees()) == 2 * (N - 1)
+        assert min(csr.bfs(1)[1:]) == 0 and -1 not in csr.bfs(1)[1:]
+
+        adj = tree.adj_list()
+        assert len(adj) == N + 1
+        for u, v, w in tree.val():
+            assert (v, w) in adj[u] and (u, w) in adj[v]
+
+        fp = io.BytesIO()
+        tree.write_adj_list(fp)
+        lines = fp.getvalue().decode().split("\n")
+        assert len(lines) == N
+        for node, line in enumerate(lines, 1):
+            vals = list(map(int, line.split()))
+            assert vals[0] == csr.degree(node) and len(vals) == 1 + 2 * vals[0]
+
+        graph = Graph(N, 3 * N, directed=True)
+        assert sum(graph.csr().degrees()) == 3 * N
+
 
 class TestTree(TestDataTypesMixin, TestGraphMixin):
     def test_tree(self):
@@ -333,6 +441,49 @@ class TestTree(TestDataTypesMixin, TestGraphMixin):
             edges = Tree(100).val()
             assert self.is_tree(100, edges)
 
+    def test_shuffle_nodes(self):
+        tree = Tree(100, Integer(1, 5))
+        edges = list(tree.val())
+        shuffled = tree.shuffle_nodes().val()
+        assert self.is_tree(100, shuffled) and self.is_connected(100, shuffled)
+        assert shuffled != edges
+        # Node degrees are relabeled, so their multiset doesn't change
+        assert self.degrees(100, shuffled) == self.degrees(100, edges)
+        assert [w for *_, w in shuffled] == [w for *_, w in edges]
+
+        # Node 100 is always an endpoint of the last edge before shuffling
+        assert any(100 not in Tree(10).shuffle_nodes().val()[-1] for _ in range(20))
+
+    def test_shuffle(self):
+        tree = Tree(100, Integer(1, 10**9))
+        edges = list(tree.val())
+        shuffled = tree.shuffle().val()
+        assert shuffled != edges
+        assert self.undirected(shuffled) == self.undirected(edges)
+        assert set(shuffled) != set(edges)  # some edges were swapped
+
+        graph = Graph(50, 200, directed=True)
+        edges = list(graph.val())
+        assert sorted(graph.shuffle().val()) == sorted(edges)
+
+
+class TestKRegularTree(TestDataTypesMixin, TestGraphMixin):
+    def test_kregulartree(self):
+        # The edge rules come from Graph
+        tree = KRegularTree(50, Integer(1, 9), k=3)
+        edges = tree.val()
+        assert self.is_tree(50, edges) and self.is_connected(50, edges)
+        assert not self.has_duplicate_edge(50, edges)
+        assert not self.has_self_edge(50, edges)
+        assert all(1 <= w <= 9 for *_, w in edges)
+        assert self.degrees(50, edges)[-1] <= 4
+        assert tree._max_edges() == Tree(50)._max_edges()
+
+    def test_stargraph(self):
+        edges = StarGraph(Integer(10, 10)).val()
+        assert self.is_tree(10, edges)
+        assert self.degrees(10, edges)[-1] == 9
+
 
 class TestLineGraph(TestDataTypesMixin, TestGraphMixin):
     def test_linegraph(self):
@@ -379,6 +530,40 @@ class TestGrid(TestDataTypesMixin, TestGraphMixin):
             for j in range(M):
                 assert grid[i][j] == grid_arr[i][j]
 
+    def test_byte_rows(self):
+        grid = Grid(5, 8)
+        assert all(isinstance(row, list) for row in grid.val())
+        assert set(str(grid).split()) <= {"0", "1"}
+        grid[2][3] = 1
+        assert grid[2][3] == 1
+        assert str(grid).split("\n")[2].split(" ")[3] == "1"
+        # Rows are plain lists, anything can be put in them
+        grid[0][0] = 300
+        grid[1][1] = "#"
+        grid[4][0] = True
+        rows = str(grid).split("\n")
+        assert rows == [" ".join(map(str, row)) for row in grid.val()]
+        assert grid.val()[3] == list(grid.val()[3])
+
+        grid = Grid(4, 6, Integer(0, 9), space_seperated=False)
+        rows = str(grid).split("\n")
+        assert rows == ["".join(map(str, row)) for row in grid.val()]
+
+        grid = Grid(4, 6, Integer(5, 200))
+        assert str(grid).split("\n") == [" ".join(map(str, row)) for row in grid.val()]
+        assert all(5 <= cell <= 200 for row in grid.val() for cell in row)
+
+    def test_compact(self):
+        for type in (Bool(), Integer(0, 9), Integer(5, 200)):
+            grid = Grid(4, 6, type, compact=True)
+            assert all(isinstance(row, bytearray) for row in grid.val())
+            assert str(grid).split("\n") == [" ".join(map(str, row)) for row in grid.val()]
+
+        # Values that don't fit in a byte keep list rows
+        for type in (Integer(0, 256), Integer(-1, 5), Integer(0, 9, wcnt=2)):
+            grid = Grid(3, 3, type, compact=True)
+            assert all(isinstance(row, list) for row in grid.val())
+
 
 class TestDAG(TestDataTypesMixin, TestGraphMixin):
     def test_dag(self):
@@ -390,3 +575,34 @@ class TestDAG(TestDataTypesMixin, TestGraphMixin):
         for edge in graph:
             u, v = edge
             assert 1 <= u < v <= N
+
+        graph = DAG(N, M)
+        edges = graph.val()
+        before = self.undirected(edges)
+        graph.shuffle_nodes().shuffle()
+        assert len(graph.val()) == M
+        assert not self.has_duplicate_edge(N, graph.val())
+        assert all(1 <= u < v <= N for u, v in graph.val())
+        assert self.undirected(graph.val()) != before
+
+
+class TestWrite(TestDataTypesMixin):
+    def assert_write(self, datatype):
+        fp = io.BytesIO()
+        datatype.write(fp)
+        assert fp.getvalue().decode() == str(datatype)
+
+    def test_write(self, monkeypatch):
+        # Small chunks so every datatype writes more than one
+        monkeypatch.setattr(writer, "WRITE_CHUNK", 7)
+        monkeypatch.setattr(datatypes, "WRITE_CHUNK", 7)
+        self.assert_write(Array(100))
+        self.assert_write(Array(100, Float(1, 10)))
+        self.assert_write(Array(0))
+        self.assert_write(String(100))
+        self.assert_write(String(100, as_bytes=True))
+        self.assert_write(Grid(10, 20))
+        self.assert_write(Grid(10, 20, space_seperated=False))
+        self.assert_write(Graph(10, 30, Integer(1, 10)))
+        self.assert_write(Tree(2))
+        self.assert_write(Permutation(50))
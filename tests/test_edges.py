@@ -0,0 +1,121 @@
+from tcgen.utils import random
+from tcgen.utils.edges import EdgeList, decode_prufer
+import heapq
+import pytest
+
+
+def make_edges(edges, weights=None):
+    ret = EdgeList(10)
+    ret.extend(edges)
+    if weights is not None:
+        ret.set_weights([weights])
+    return ret
+
+
+class TestEdgeList:
+    def test_sequence(self):
+        edges = [(1, 2), (2, 3), (3, 4)]
+        ret = make_edges(edges)
+        assert len(ret) == 3
+        assert list(ret) == edges
+        assert ret == edges
+        assert ret[1] == (2, 3) and ret[-1] == (3, 4)
+        assert ret[1:] == edges[1:]
+        assert (2, 3) in ret
+        assert repr(ret) == repr(edges)
+        ret[0] = (5, 6)
+        assert ret[0] == (5, 6)
+
+    def test_weights(self):
+        ret = make_edges([(1, 2), (2, 3)], [10, 20])
+        assert ret.weighted
+        assert list(ret) == [(1, 2, 10), (2, 3, 20)]
+        assert list(ret.lines()) == ["1 2 10", "2 3 20"]
+        assert ret.w.typecode == "q"
+
+        ret = make_edges([(1, 2)], [1.5])
+        assert ret.w.typecode == "d" and ret[0] == (1, 2, 1.5)
+        ret = make_edges([(1, 2)], ["a"])
+        assert ret[0] == (1, 2, "a")
+
+        ret = make_edges([(1, 2), (2, 3)])
+        ret.set_weights([[1], [2**70]])
+        assert list(ret.w) == [1, 2**70]
+
+        with pytest.raises(ValueError):
+            make_edges([(1, 2)], [1, 2])
+
+    def test_lines(self):
+        ret = make_edges([(1, 2), (2, 3), (3, 4)])
+        assert list(ret.lines()) == ["1 2", "2 3", "3 4"]
+        assert list(ret.lines(1, 2)) == ["2 3"]
+
+
+class TestCSR:
+    def test_csr(self):
+        random.seed(0)
+        N, M = 50, 200
+        edges = make_edges(
+            zip(random.randints(1, N, M), random.randints(1, N, M)), random.randints(1, 9, M)
+        )
+        for directed in [True, False]:
+            adj = [[] for _ in range(N + 1)]
+            for u, v, w in edges:
+                adj[u].append((v, w))
+                if not directed:
+                    adj[v].append((u, w))
+            adj = [sorted(nbrs) for nbrs in adj]
+
+            csr = edges.csr(N, directed)
+            assert csr.N == N and csr.weighted
+            assert len(csr.targets) == (M if directed else 2 * M)
+            assert [sorted(nbrs) for nbrs in csr.adj_list()] == adj
+            assert csr.degrees() == [len(nbrs) for nbrs in adj]
+            for node in range(1, N + 1):
+                assert csr.degree(node) == len(adj[node])
+                assert sorted(zip(csr.neighbours(node), csr.edge_weights(node))) == adj[node]
+
+    def test_order(self):
+        edges = make_edges([(1, 3), (2, 1), (1, 2), (3, 3)])
+        csr = edges.csr(4, directed=False)
+        assert not csr.weighted
+        assert csr.adj_list() == [[], [3, 2, 2], [1, 1], [3, 1, 3], []]
+        assert list(csr.lines()) == ["3 3 2 2", "2 1 1", "3 3 1 3", "0"]
+        assert edges.csr(4).adj_list() == [[], [3, 2], [1], [3], []]
+
+        edges = make_edges([(1, 2), (2, 3)], [5, 7])
+        assert list(edges.csr(3).lines()) == ["1 2 5", "1 3 7", "0"]
+
+    def test_bfs(self):
+        edges = make_edges([(1, 2), (2, 3), (3, 4), (5, 6)])
+        assert list(edges.csr(6, directed=False).bfs(1)) == [-1, 0, 1, 2, 3, -1, -1]
+        assert list(edges.csr(6).bfs(3)) == [-1, -1, -1, 0, 1, -1, -1]
+
+
+class TestDecodePrufer:
+    def decode(self, prufer, N):
+        """Textbook decoding, pops the smallest leaf with a heap"""
+        degree = [0] + [1] * N
+        for val in prufer:
+            degree[val] += 1
+        leaves = [node for node in range(1, N + 1) if degree[node] == 1]
+        heapq.heapify(leaves)
+        edges = []
+        for val in prufer:
+            edges.append((heapq.heappop(leaves), val))
+            degree[val] -= 1
+            if degree[val] == 1:
+                heapq.heappush(leaves, val)
+        edges.append((heapq.heappop(leaves), N))
+        return edges
+
+    def test_decode(self):
+        random.seed(0)
+        assert decode_prufer([], 1) == []
+        assert decode_prufer([], 2) == [(1, 2)]
+        assert decode_prufer([4, 4, 4], 5) == [(1, 4), (2, 4), (3, 4), (4, 5)]
+        for N in [3, 4, 10, 100, 1000]:
+            for _ in range(20):
+                prufer = random.randints(1, N, N - 2)
+                assert decode_prufer(prufer, N) == self.decode(prufer, N)
+        assert decode_prufer(list(range(1, 9)), 10) == self.decode(list(range(1, 9)), 10)
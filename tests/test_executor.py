@@ -0,0 +1,86 @@
+from tcgen.utils.executor import Executor, Job
+import pytest
+import signal
+import sys
+import time
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+class TestExecutor:
+    def test_run(self, tmp_path):
+        src = tmp_path / "1.in"
+        src.write_text("3 4\n")
+        dst = tmp_path / "1.out"
+        code = "a, b = map(int, input().split()); print(a + b)"
+        (result,) = Executor(2).run([Job(python(code), str(src), str(dst))])
+        assert result.ok and result.returncode == 0
+        assert dst.read_text() == "7\n"
+        assert result.wall_time > 0 and result.peak_rss_kb > 0
+
+    def test_error(self):
+        (result,) = Executor().run([Job(python("import sys; sys.stderr.write('boom'); sys.exit(3)"))])
+        assert not result.ok and not result.timed_out
+        assert result.returncode == 3
+        assert result.stderr == "boom"
+
+    def test_timeout(self):
+        start = time.perf_counter()
+        (result,) = Executor().run([Job(python("import time; time.sleep(10)"), timeout=0.2)])
+        assert time.perf_counter() - start < 5
+        assert result.timed_out and not result.ok
+        assert result.returncode < 0
+
+    def test_cpu_limit(self):
+        (result,) = Executor().run([Job(python("while True: pass"), cpu_limit=1)])
+        assert result.returncode == -signal.SIGXCPU
+        assert 0.9 < result.cpu_time < 3
+
+    def test_peak_rss(self):
+        # What this process holds isn't counted against the job
+        ballast = bytearray(b"\x01") * (256 << 20)
+        (result,) = Executor().run([Job(python("pass"))])
+        assert 0 < result.peak_rss_kb < 64 << 10
+        (result,) = Executor().run([Job(python("x = bytearray(b'\\x01') * (128 << 20)"))])
+        assert 128 << 10 < result.peak_rss_kb < 192 << 10
+        del ballast
+
+    def test_missing_command(self, tmp_path):
+        with pytest.raises(OSError):
+            Executor().run([Job([str(tmp_path / "missing")])])
+        with pytest.raises(OSError):
+            Executor().run([Job(python("pass"), str(tmp_path / "missing.in"))])
+
+    def test_memory_limit(self):
+        code = "x = bytearray(512 << 20)"
+        (result,) = Executor().run([Job(python(code), memory_limit=256 << 20)])
+        assert result.returncode == 1 and "MemoryError" in result.stderr
+        (result,) = Executor().run([Job(python(code))])
+        assert result.ok
+
+    def test_progress_order(self):
+        # Later jobs finish first, progress still follows the order of jobs
+        jobs = [Job(python(f"import time; time.sleep({0.3 - 0.1 * idx})")) for idx in range(3)]
+        seen = []
+        results = Executor(3).run(jobs, lambda cnt, result: seen.append((cnt, result.job)))
+        assert seen == [(1, jobs[0]), (2, jobs[1]), (3, jobs[2])]
+        assert [result.job for result in results] == jobs
+
+    def test_concurrency(self):
+        jobs = [Job(python("import time; time.sleep(0.5)")) for _ in range(8)]
+        start = time.perf_counter()
+        Executor(8).run(jobs)
+        assert time.perf_counter() - start < 3
+
+    def test_cancel(self):
+        def progress(cnt, result):
+            raise KeyboardInterrupt
+
+        jobs = [Job(python("pass"))] + [Job(python("import time; time.sleep(10)")) for _ in range(3)]
+        start = time.perf_counter()
+        with pytest.raises(KeyboardInterrupt):
+            Executor(4).run(jobs, progress)
+        # The sleeping jobs were killed instead of waited on
+        assert time.perf_counter() - start < 5
@@ -0,0 +1,137 @@
+from tcgen.datatypes import *
+from tcgen.generator import Generator, load_generator
+from tcgen.primitives import *
+from tcgen.utils import random
+import io
+
+
+class Gen(Generator):
+    def generate(self, case_num):
+        N = Integer(5, 10)
+        self.p(N, case_num)
+        self.p(Array(N))
+        self.p(String(N))
+        self.p(Grid(2, 3))
+        self.p(Graph(N, N + 2, Integer(1, 5)))
+        self.p(Tree(N))
+
+
+class TestGenerator:
+    def setup_method(self):
+        random.seed(0)
+
+    def test_get_test_case(self):
+        lines = Gen().get_test_case().split("\n")
+        N = int(lines[0].split(" ")[0])
+        assert lines[0] == f"{N} 1"
+        assert len(lines[1].split(" ")) == N
+        assert len(lines[2]) == N
+        assert lines[-1] == ""
+
+    def test_write_test_case(self):
+        fp = io.BytesIO()
+        random.seed(1)
+        Gen().write_test_case(fp, 3)
+        random.seed(1)
+        gen = Gen()
+        gen.output = ""
+        gen.generate(3)
+        assert fp.getvalue().decode() == gen.output
+        # Output goes back to the string once done
+        assert Gen().get_test_case()
+
+    def test_get_test_cases(self):
+        cases = Gen().get_test_cases(3)
+        assert len(cases) == 3
+        for case_num, case in enumerate(cases):
+            assert case.split("\n")[0].endswith(f" {case_num}")
+
+    def test_sinks(self, tmp_path):
+        random.seed(2)
+        cases = Gen().get_test_cases(3)
+
+        random.seed(2)
+        fp = io.BytesIO()
+        assert Gen().get_test_cases(3, fp) is None
+        assert fp.getvalue().decode() == "".join(cases)
+
+        random.seed(2)
+        Gen().get_test_cases(3, str(tmp_path / "{}.in"))
+        for case_num, case in enumerate(cases):
+            assert (tmp_path / f"{case_num}.in").read_text() == case
+
+        random.seed(2)
+        received = []
+        Gen().get_test_cases(3, lambda case_num, output: received.append((case_num, output)))
+        assert received == list(enumerate(cases))
+
+    def test_output(self):
+        gen = Gen()
+        gen.output = "a\n"
+        gen.p(1, 2)
+        gen.output += "b\n"
+        assert gen.output == "a\n1 2\nb\n"
+
+    def test_seeded(self):
+        cases = Gen().get_test_cases(6, seed=123)
+        assert Gen().get_test_cases(6, seed=123) == cases
+        assert Gen().get_test_cases(6, seed=124) != cases
+        # Any case can be regenerated on its own, without touching the global state
+        random.seed(5)
+        assert Gen()._run_case(4, 123) == cases[4]
+        value = random.randint(1, 10**9)
+        random.seed(5)
+        assert random.randint(1, 10**9) == value
+
+    def test_parallel(self, tmp_path):
+        cases = Gen().get_test_cases(6, seed=123)
+        for workers in [2, 3]:
+            assert Gen().get_test_cases(6, seed=123, workers=workers) == cases
+
+        fp = io.BytesIO()
+        Gen().get_test_cases(6, fp, seed=123, workers=2)
+        assert fp.getvalue().decode() == "".join(cases)
+
+        Gen().get_test_cases(6, str(tmp_path / "{}.in"), seed=123, workers=2)
+        for case_num, case in enumerate(cases):
+            assert (tmp_path / f"{case_num}.in").read_text() == case
+
+        assert len(Gen().get_test_cases(4, workers=2)) == 4
+
+    def test_load_generator(self, source, tmp_path):
+        # Indirect subclasses count, abstract ones and imported ones don't
+        path = source("gen.py", "\n".join([
+            "from abc import abstractmethod",
+            "from tcgen import *",
+            "from tcgen.generator import Generator as Base",
+            "class Gen(Base):",
+            "    def generate(self, case_num):",
+            "        self.p(case_num)",
+            "class Last(Gen):",
+            "    pass",
+            "class Abstract(Gen):",
+            "    @abstractmethod",
+            "    def generate(self, case_num):",
+            "        pass",
+            "if __name__ == '__main__':",
+            "    raise SystemExit('ran as __main__')",
+        ]))
+        generator = load_generator(path)
+        assert type(generator).__name__ == "Last"
+        assert generator.get_test_case() == "1\n"
+
+        # Scripts aren't run: files without a class, and those whose top level
+        # does more than define things even if they define a generator
+        script = f"open({str(tmp_path / 'ran')!r}, 'w').close()"
+        assert load_generator(source("plain.py", f"import os\n{script}")) is None
+        assert load_generator(source("printing.py", "\n".join([
+            "from tcgen import *",
+            "class Gen(Generator):",
+            "    def generate(self, case_num):",
+            "        self.p(case_num)",
+            "gen = Gen()",
+            f"print(gen.get_test_case()); {script}",
+        ]))) is None
+        assert not (tmp_path / "ran").exists()
+        assert load_generator(source("helper.py", f"class Helper:\n    {script}")) is None
+        assert (tmp_path / "ran").exists()
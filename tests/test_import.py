@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+# Run from the repository root so the tcgen being tested is the one imported
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds `import tcgen` may take, sympy alone takes about half a second
+IMPORT_BUDGET = 0.25
+
+CODE = """
+import json, sys, time
+start = time.perf_counter()
+import tcgen
+from tcgen import *
+print(json.dumps({
+    "time": time.perf_counter() - start,
+    "modules": [name for name in ("sympy", "numpy", "multiprocessing") if name in sys.modules],
+}))
+"""
+
+
+def run_import():
+    out = subprocess.run([sys.executable, "-c", CODE], capture_output=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout)
+
+
+def test_import_time():
+    # The fastest of a few runs, so a busy machine doesn't fail the test
+    runs = [run_import() for _ in range(3)]
+    assert min(run["time"] for run in runs) < IMPORT_BUDGET
+    assert runs[0]["modules"] == []
+
+
+def test_lazy_sympy():
+    code = "import sys\nfrom tcgen import *\n"
+    code += "Array(10, Prime(100)).val()\nassert 'sympy' not in sys.modules\n"
+    code += "Prime(10**18).val()\nassert 'sympy' in sys.modules\n"
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT)
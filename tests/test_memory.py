@@ -0,0 +1,43 @@
+from tcgen.datatypes import *
+from tcgen.primitives import *
+import pytest
+import tracemalloc
+
+# (make, bytes each object may take), the budgets are well under what the
+# objects took with a __dict__, e.g. 177 for an Integer and 281 for an Array
+PRIMITIVES = [
+    (Integer, 144),
+    (Bool, 120),
+    (Float, 128),
+    (Char, 200),
+    (lambda: Integer(1, 10, wcnt=3), 120),
+]
+DATATYPES = [
+    (lambda: Array(5), 224),
+    (lambda: String(5), 280),
+    (lambda: NonDecreasing(5), 224),
+    (lambda: Permutation(5), 200),
+    (lambda: Grid(2, 2), 200),
+    (lambda: Graph(5, 6), 128),
+    (lambda: Tree(5), 128),
+    (lambda: LineGraph(5), 136),
+    (lambda: DAG(5, 6), 128),
+]
+
+
+def per_object(make, N=5000):
+    """Average bytes allocated for each object make() returns"""
+    tracemalloc.start()
+    try:
+        objs = [make() for _ in range(N)]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(objs) == N
+    return size / N
+
+
+@pytest.mark.parametrize("make, budget", PRIMITIVES + DATATYPES)
+def test_memory(make, budget):
+    assert not hasattr(make(), "__dict__")
+    assert per_object(make) < budget
@@ -0,0 +1,75 @@
+from sympy import isprime, primerange
+from tcgen.utils import primes
+import pytest
+
+
+class TestPrimes:
+    def test_prime_range(self):
+        L = 100
+        U = 5000
+        table = primes.prime_range(L, U)
+        assert list(table.values(range(len(table)))) == list(primerange(L, U + 1))
+        assert len(primes.prime_range(8, 10)) == 0
+        assert len(primes.prime_range(-10, 2)) == 1
+        with pytest.raises(IndexError):
+            table[len(table)]
+
+    def test_segments(self):
+        # Spans several segments and doesn't start on a multiple of the segment size
+        L = 12345
+        U = L + 3 * primes.SEGMENT_SIZE
+        table = primes.prime_range(L, U)
+        assert table[0] == 12347
+        assert all(isprime(table[idx]) for idx in range(0, len(table), 997))
+        assert len(table) == primes.count_primes(L, U)
+
+    def test_shared_tables(self):
+        primes.clear_cache()
+        outer = primes.prime_range(1, 10**5)
+        inner = primes.prime_range(1000, 2000)
+        assert inner._table is outer._table
+        assert inner[0] == 1009
+
+    def test_narrow_ranges(self):
+        # Nearby narrow ranges share the block covering them
+        primes.clear_cache()
+        for idx in range(2000):
+            L = 10**6 + 50 * idx
+            table = primes.prime_range(L, L + 1000)
+            assert table[0] == primes.kth_prime(L, L + 1000, 1)
+        assert len(primes._tables) <= 3
+        # Far apart ones don't grow the cache past TABLE_LIMIT
+        for idx in range(2 * primes.TABLE_LIMIT):
+            primes.prime_range(idx * 10**6, idx * 10**6 + 10)
+        assert len(primes._tables) == primes.TABLE_LIMIT
+        assert primes._cached == sum(len(table) for table in primes._tables.values())
+
+    def test_sieve_cost(self):
+        # High ranges loop over millions of base primes, they're left to sympy
+        assert primes.can_sieve(1, 10**6)
+        assert not primes.can_sieve(10**15 - 10**7, 10**15)
+        assert not primes.can_sieve(10**14, 10**14 + 3 * 10**7)
+        assert primes.can_sieve(1, 10**7)
+        assert not primes.can_sieve(1, 10**7, primes.CHECK_LIMIT)
+
+    def test_count_primes(self):
+        assert primes.count_primes(1, 100) == 25
+        assert primes.count_primes(100, 1) == 0
+        assert primes.count_primes(1, 10**9) == 50847534
+
+    def test_has_prime(self):
+        assert primes.has_prime(1, 2)
+        assert not primes.has_prime(8, 10)
+        assert primes.has_prime(10**12, 10**13)
+        assert not primes.has_prime(10**12 - 1, 10**12)
+
+    def test_kth_prime(self):
+        assert primes.kth_prime(1, 100, 1) == 2
+        assert primes.kth_prime(1, 100, 25) == 97
+        assert primes.kth_prime(10**12, 10**13, 1) == 1000000000039
+        with pytest.raises(IndexError):
+            primes.kth_prime(1, 100, 26)
+        with pytest.raises(IndexError):
+            primes.kth_prime(1, 100, 0)
+        with pytest.raises(IndexError):
+            primes.kth_prime(10**12 - 1, 10**12, 1)
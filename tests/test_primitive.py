@@ -1,7 +1,8 @@
 from sympy import isprime
+from tcgen.datatypes import Array
 from tcgen.primitives import *
 from tcgen.primitives import Primitive, SortableMixin
-from tcgen.utils import random, InvalidRangeException
+from tcgen.utils import primes, random, InvalidRangeException
 from tcgen.utils.constants import *
 import pytest
 import re
@@ -26,6 +27,8 @@ class TestSortableMixin:
             SortableMixin()._total_values()
         with pytest.raises(NotImplementedError):
             SortableMixin()._kth_smallest(1)
+        with pytest.raises(NotImplementedError):
+            SortableMixin()._kth_smallest_many([1])
 
 
 class TestPrimitive:
@@ -65,6 +68,17 @@ class TestInteger(TestPrimitiveMixin):
     def test_valid_integer(self):
         assert 100 <= Integer(100, 110).int() <= 110
 
+    def test_generate_many(self):
+        integer = Integer(100, 110)
+        vals = integer._generate_many(100)
+        assert len(vals) == 100 and all(100 <= val <= 110 for val in vals)
+        assert integer.val() == vals[-1]
+        vals = Integer(1, 3, inclusive=False)._generate_many(10)
+        assert vals == [2] * 10
+        vals = Integer(100, 110, wcnt=5)._generate_many(100)
+        assert len(vals) == 100 and all(100 <= val <= 110 for val in vals)
+        assert Integer()._generate_many(0) == []
+
     # TODO: Use stats or something to test weighted randoms
     # def test_weighted_integer(self):
     #     assert Integer(1, 1e9, wcnt=25).int() == 985946605
@@ -96,6 +110,21 @@ class TestInteger(TestPrimitiveMixin):
         with pytest.raises(IndexError):
             Integer(1, N, inclusive=True)._kth_smallest(N + 1)
 
+    def test_kth_smallest_many(self):
+        N = 100
+        ks = [1, 15, 15, 99, 100]
+        integer = Integer(1, N)
+        assert integer._kth_smallest_many(ks) == [integer._kth_smallest(k) for k in ks]
+        integer = Integer(1, N, inclusive=False)
+        assert integer._kth_smallest_many(ks[:-2]) == [
+            integer._kth_smallest(k) for k in ks[:-2]
+        ]
+        assert integer._kth_smallest_many([]) == []
+        with pytest.raises(IndexError):
+            Integer(1, N)._kth_smallest_many([0, 5])
+        with pytest.raises(IndexError):
+            Integer(1, N)._kth_smallest_many([5, N + 1])
+
     def test_arithmetic(self):
         a = Integer(1, 3)
         b = Integer(1, 3)
@@ -110,6 +139,28 @@ class TestInteger(TestPrimitiveMixin):
         assert int(d / 10) == 4
         assert int(d * 10) == 40
 
+    def test_samplers(self):
+        a = Integer(1, 3)
+        a._generate()
+        samplers = a._samplers()
+        a._generate()
+        assert a._samplers() is samplers
+
+        # Changing the bounds recompiles the samplers
+        a.value = None
+        a += 10
+        assert all(11 <= a._generate() <= 13 for _ in range(50))
+        assert all(11 <= v <= 13 for v in a._generate_many(50))
+        a.exclusive()
+        assert all(a._generate() == 12 for _ in range(20))
+        a.inclusive()
+        assert {a._generate() for _ in range(200)} == {11, 12, 13}
+
+        arr = Array(50, a).assign(100, 105)
+        assert all(100 <= v <= 105 for v in arr.val())
+        with pytest.raises(InvalidRangeException):
+            Integer(5, 5).exclusive()._generate()
+
 
 class TestPrime(TestPrimitiveMixin):
     def test_prime(self):
@@ -127,6 +178,16 @@ class TestPrime(TestPrimitiveMixin):
         val = Prime(1, 1e9).val()
         assert 1 <= val <= 1e9 and isprime(val)
 
+    def test_high_range(self):
+        # Sieving these takes seconds, they're drawn without building a table
+        tables = list(primes._tables)
+        for L, U in ((10**15 - 10**7, 10**15), (10**14, 10**14 + 3 * 10**7)):
+            prime = Prime(L, U)
+            val = prime.val()
+            assert L <= val <= U and isprime(val)
+            assert L <= prime.int() <= U
+        assert list(primes._tables) == tables
+
     # TODO: Figure out how to test weighted randoms
     # def test_weighted_prime(self):
     #     assert Prime(1, 1e9, wcnt=25).int() == 985946617
@@ -169,6 +230,17 @@ class TestPrime(TestPrimitiveMixin):
         with pytest.raises(IndexError):
             Prime(1, 100, inclusive=True)._kth_smallest(1000)
 
+    def test_kth_smallest_many(self):
+        ks = [1, 2, 15, 100]
+        for prime in [Prime(1019, 5000), Prime(1019, 5000, inclusive=False)]:
+            assert prime._kth_smallest_many(ks) == [prime._kth_smallest(k) for k in ks]
+        prime = Prime(10**12, 10**13)
+        assert prime._kth_smallest_many(ks) == [prime._kth_smallest(k) for k in ks]
+        with pytest.raises(IndexError):
+            Prime(1, 100)._kth_smallest_many([1, 26])
+        with pytest.raises(IndexError):
+            Prime(1, 100)._kth_smallest_many([0])
+
     def test_exclusive(self):
         assert 1 < Prime(1, 5, inclusive=False).int() < 5
         assert 1 < Prime(1, 5).exclusive().int() < 5
@@ -232,6 +304,13 @@ class TestFloat(TestPrimitiveMixin):
         with pytest.raises(IndexError):
             Float(1, 100, inclusive=True)._kth_smallest(10000)
 
+    def test_kth_smallest_many(self):
+        ks = [1, 2, 15, 9000]
+        for flt in [Float(500, 5000), Float(500, 5000, inclusive=False)]:
+            assert flt._kth_smallest_many(ks) == [flt._kth_smallest(k) for k in ks]
+        with pytest.raises(IndexError):
+            Float(1, 100)._kth_smallest_many([1, 10000])
+
     def test_exclusive(self):
         # TODO: Fix float it is able to generate values from 0 to 1
         # assert 1 < Float(1, 2, inclusive=False).float() < 2
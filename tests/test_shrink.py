@@ -0,0 +1,86 @@
+from tcgen.datatypes import *
+from tcgen.generator import Generator
+from tcgen.primitives import *
+from tcgen.shrink import shrink
+from tcgen.stress import Failure, stress
+import pytest
+
+# Prints 0 whatever the input, the solutions below print 1 on the inputs they get wrong
+ZERO = "print(0)"
+
+
+class ArrayGen(Generator):
+    def generate(self, case_num):
+        N = Integer(1, 30)
+        self.p(N)
+        self.p(Array(N, Integer(1, 1000)))
+
+
+class GraphGen(Generator):
+    def generate(self, case_num):
+        N = Integer(5, 8).val()
+        M = Integer(9, 12).val()
+        self.p(N, M)
+        self.p(Graph(N, M, Integer(1, 100)))
+
+
+class TreeGen(Generator):
+    def generate(self, case_num):
+        N = Integer(5, 30)
+        self.p(N, "tree")
+        self.p(Tree(N))
+        self.p(String(N))
+
+
+class TestShrink:
+    def shrink(self, generator, solution, brute):
+        failure = stress(generator, solution, brute, seed=1, workers=1, out_dir=None)
+        assert failure is not None
+        shrunk, runs = shrink(generator, failure, solution, brute, workers=1)
+        assert shrunk.reason == failure.reason
+        assert len(shrunk.input) < len(failure.input)
+        return shrunk.input.split("\n")
+
+    def test_array(self, source):
+        # Wrong when there are 3 values and one is over 500
+        sol = source("sol.py", "input(); a = list(map(int, input().split())); print(int(len(a) >= 3 and max(a) > 500))")
+        lines = self.shrink(ArrayGen(), sol, source("brute.py", ZERO))
+        assert lines[0] == "3"
+        vals = sorted(map(int, lines[1].split()))
+        assert vals[:2] == [1, 1] and vals[2] > 500
+
+    def test_graph(self, source):
+        # Wrong when there are at least 3 edges
+        sol = source("sol.py", "n, m = map(int, input().split()); print(int(m >= 3))")
+        lines = self.shrink(GraphGen(), sol, source("brute.py", ZERO))
+        N, M = map(int, lines[0].split())
+        assert M == 3 and N <= 4
+        edges = [tuple(map(int, line.split())) for line in lines[1:1 + M]]
+        assert all(1 <= u <= N and 1 <= v <= N and w == 1 for u, v, w in edges)
+
+    def test_tree(self, source):
+        # Wrong when a node has 3 neighbours and the string has an a
+        sol = source("sol.py", "\n".join([
+            "n = int(input().split()[0])",
+            "degree = [0] * (n + 1)",
+            "for _ in range(n - 1):",
+            "    u, v = map(int, input().split())",
+            "    degree[u] += 1",
+            "    degree[v] += 1",
+            "print(int(max(degree) >= 3 and 'a' in input()))",
+        ]))
+        lines = self.shrink(TreeGen(), sol, source("brute.py", ZERO))
+        # N can't go below 5
+        assert lines[0] == "5 tree"
+        nodes = [int(node) for line in lines[1:5] for node in line.split()]
+        assert max(nodes.count(node) for node in range(1, 6)) >= 3
+        assert len(lines[5]) == 5 and "a" in lines[5]
+
+    def test_errors(self, source):
+        sol = source("sol.py", "print(1)")
+        brute = source("brute.py", ZERO)
+        failure = stress(ArrayGen(), sol, brute, seed=1, workers=1, out_dir=None)
+        with pytest.raises(ValueError):
+            shrink(ArrayGen(), Failure(failure.iteration, failure.seed, failure.reason, "1\n1\n"), sol, brute)
+        with pytest.raises(ValueError):
+            shrink(ArrayGen(), failure, brute, brute)
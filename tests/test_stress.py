@@ -0,0 +1,74 @@
+from tcgen.datatypes import *
+from tcgen.generator import Generator
+from tcgen.primitives import *
+from tcgen.stress import stress
+
+SUM = "print(sum(map(int, input().split())))"
+# Wrong whenever the first value is odd
+WRONG_SUM = "a = list(map(int, input().split())); print(sum(a) + a[0] % 2)"
+
+
+class Gen(Generator):
+    def generate(self, case_num):
+        self.p(Array(3, Integer(1, 10)))
+
+
+class TestStress:
+    def test_pass(self, source, tmp_path):
+        seen = []
+        failure = stress(
+            Gen(), source("sol.py", SUM), source("brute.py", SUM),
+            iterations=20, seed=0, workers=2, out_dir=str(tmp_path), progress=seen.append,
+        )
+        assert failure is None
+        assert not list(tmp_path.glob("stress_*"))
+
+    def test_mismatch(self, source, tmp_path):
+        failure = stress(
+            Gen(), source("sol.py", WRONG_SUM), source("brute.py", SUM),
+            seed=0, workers=2, out_dir=str(tmp_path),
+        )
+        assert failure.reason == "Wrong answer"
+        # The failing case can be generated again from the seed and iteration
+        assert failure.input == Gen()._run_case(failure.iteration, failure.seed)
+        vals = list(map(int, failure.input.split()))
+        assert vals[0] % 2 == 1
+        assert int(failure.output) == sum(vals) + 1
+        assert int(failure.expected) == sum(vals)
+        with open(failure.path) as f:
+            assert f.read() == failure.input
+
+    def test_same_failure(self, source, tmp_path):
+        sol, brute = source("sol.py", WRONG_SUM), source("brute.py", SUM)
+        iterations = {
+            stress(Gen(), sol, brute, seed=5, workers=workers, out_dir=None).iteration
+            for workers in (1, 2, 3)
+        }
+        assert len(iterations) == 1
+
+    def test_checker(self, source):
+        # Accepts anything within 1 of the expected answer
+        def checker(input, output, expected):
+            return abs(int(output) - int(expected)) <= 1
+
+        failure = stress(
+            Gen(), source("sol.py", WRONG_SUM), source("brute.py", SUM), checker,
+            iterations=20, seed=0, workers=2, out_dir=None,
+        )
+        assert failure is None
+
+    def test_errors(self, source):
+        failure = stress(
+            Gen(), source("sol.py", "raise ValueError"), source("brute.py", SUM),
+            seed=0, workers=1, out_dir=None,
+        )
+        assert failure.iteration == 1
+        assert failure.reason.startswith("Solution exited with 1")
+        assert "ValueError" in failure.reason
+
+        failure = stress(
+            Gen(), source("sol.py", SUM), source("brute.py", "import time; time.sleep(10)"),
+            seed=0, workers=1, timeout=0.5, out_dir=None,
+        )
+        assert failure.reason == "Brute force timed out"
+        assert failure.output is not None and failure.expected is None